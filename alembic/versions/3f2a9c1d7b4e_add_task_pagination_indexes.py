@@ -0,0 +1,30 @@
+"""add task pagination indexes
+
+Revision ID: 3f2a9c1d7b4e
+Revises: 89fba9b56841
+Create Date: 2025-01-20 10:12:41.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2a9c1d7b4e'
+down_revision: Union[str, None] = '89fba9b56841'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_user_due_date_id', 'tasks', ['user_id', 'due_date', 'id'])
+    op.create_index('ix_tasks_user_status_due_date_id', 'tasks', ['user_id', 'status', 'due_date', 'id'])
+    op.create_index('ix_tasks_user_priority_due_date_id', 'tasks', ['user_id', 'priority', 'due_date', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_user_priority_due_date_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_status_due_date_id', table_name='tasks')
+    op.drop_index('ix_tasks_user_due_date_id', table_name='tasks')
@@ -0,0 +1,112 @@
+"""partition notifications by month
+
+Revision ID: a7d3e9c1b552
+Revises: f2b6c4d9e013
+Create Date: 2025-02-10 09:14:52.408316
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9c1b552'
+down_revision: Union[str, None] = 'f2b6c4d9e013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Future months created up front; maintain_notification_partitions keeps them ahead afterwards
+PARTITIONS_AHEAD = 3
+
+COLUMNS = 'id, message, task_id, user_id, is_read, created_at, sent_at'
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def create_indexes() -> None:
+    op.create_index('ix_notifications_id', 'notifications', ['id'])
+    op.create_index(
+        'ix_notifications_user_unread_created_at', 'notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('NOT is_read'),
+    )
+
+
+def drop_indexes(table: str) -> None:
+    op.drop_index('ix_notifications_id', table_name=table)
+    op.drop_index('ix_notifications_user_unread_created_at', table_name=table)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # Partition keys must be part of the primary key, hence (id, created_at)
+        op.rename_table('notifications', 'notifications_unpartitioned')
+        op.execute('ALTER TABLE notifications_unpartitioned RENAME CONSTRAINT notifications_pkey TO notifications_unpartitioned_pkey')
+        drop_indexes('notifications_unpartitioned')
+        op.execute(
+            """
+            CREATE TABLE notifications (
+                id UUID NOT NULL,
+                message VARCHAR NOT NULL,
+                task_id UUID NOT NULL REFERENCES tasks (id),
+                user_id UUID NOT NULL REFERENCES users (id),
+                is_read BOOLEAN NOT NULL,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                sent_at TIMESTAMP WITHOUT TIME ZONE,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+
+        # One partition per month from the oldest notification on, and a default for anything outside them
+        oldest = op.get_bind().scalar(sa.text('SELECT min(created_at) FROM notifications_unpartitioned'))
+        month = add_months(oldest or datetime.now(), 0)
+        last = add_months(datetime.now(), PARTITIONS_AHEAD)
+        while month <= last:
+            op.execute(
+                f"CREATE TABLE notifications_y{month.year:04d}m{month.month:02d} PARTITION OF notifications "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+        op.execute('CREATE TABLE notifications_default PARTITION OF notifications DEFAULT')
+
+        op.execute(f'INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_unpartitioned')
+        op.drop_table('notifications_unpartitioned')
+        create_indexes()
+
+    op.create_index(
+        'ix_notifications_read_created_at', 'notifications', ['created_at'],
+        postgresql_where=sa.text('is_read'), sqlite_where=sa.text('is_read'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_read_created_at', table_name='notifications')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.rename_table('notifications', 'notifications_partitioned')
+        op.execute('ALTER TABLE notifications_partitioned RENAME CONSTRAINT notifications_pkey TO notifications_partitioned_pkey')
+        drop_indexes('notifications_partitioned')
+        op.execute(
+            """
+            CREATE TABLE notifications (
+                id UUID NOT NULL PRIMARY KEY,
+                message VARCHAR NOT NULL,
+                task_id UUID NOT NULL REFERENCES tasks (id),
+                user_id UUID NOT NULL REFERENCES users (id),
+                is_read BOOLEAN NOT NULL,
+                created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                sent_at TIMESTAMP WITHOUT TIME ZONE
+            )
+            """
+        )
+        op.execute(f'INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_partitioned')
+        # Dropping the parent drops its partitions
+        op.drop_table('notifications_partitioned')
+        create_indexes()
@@ -0,0 +1,31 @@
+"""add task next_occurrence_at
+
+Revision ID: b71e4d2a9c05
+Revises: 3f2a9c1d7b4e
+Create Date: 2025-01-27 09:41:17.552903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71e4d2a9c05'
+down_revision: Union[str, None] = '3f2a9c1d7b4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('next_occurrence_at', sa.DateTime(), nullable=True))
+    op.create_index(
+        'ix_tasks_recurring_next_occurrence_at', 'tasks', ['next_occurrence_at'],
+        postgresql_where=sa.text('is_recurring'), sqlite_where=sa.text('is_recurring'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_recurring_next_occurrence_at', table_name='tasks')
+    op.drop_column('tasks', 'next_occurrence_at')
@@ -0,0 +1,28 @@
+"""add task reminder tracking
+
+Revision ID: d4c8e07f1a36
+Revises: b71e4d2a9c05
+Create Date: 2025-01-29 14:03:52.108736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4c8e07f1a36'
+down_revision: Union[str, None] = 'b71e4d2a9c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('last_reminded_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_tasks_status_due_date', 'tasks', ['status', 'due_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_status_due_date', table_name='tasks')
+    op.drop_column('tasks', 'last_reminded_at')
@@ -0,0 +1,43 @@
+"""index task dependencies
+
+Revision ID: e5f1a8b3c926
+Revises: d4c8e07f1a36
+Create Date: 2025-02-03 11:26:08.731542
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f1a8b3c926'
+down_revision: Union[str, None] = 'd4c8e07f1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Remove duplicate edges so the unique index can be created, keeping one row per edge
+    op.execute(
+        """
+        DELETE FROM task_dependencies WHERE id IN (
+            SELECT a.id FROM task_dependencies a
+            JOIN task_dependencies b
+              ON a.task_id = b.task_id
+             AND a.dependent_task_id = b.dependent_task_id
+             AND a.id > b.id
+        )
+        """
+    )
+    op.create_index(
+        'ix_task_dependencies_task_id_dependent_task_id', 'task_dependencies',
+        ['task_id', 'dependent_task_id'], unique=True,
+    )
+    op.create_index('ix_task_dependencies_dependent_task_id', 'task_dependencies', ['dependent_task_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_dependencies_dependent_task_id', table_name='task_dependencies')
+    op.drop_index('ix_task_dependencies_task_id_dependent_task_id', table_name='task_dependencies')
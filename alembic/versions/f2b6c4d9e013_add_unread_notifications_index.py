@@ -0,0 +1,30 @@
+"""add unread notifications index
+
+Revision ID: f2b6c4d9e013
+Revises: e5f1a8b3c926
+Create Date: 2025-02-06 16:48:33.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6c4d9e013'
+down_revision: Union[str, None] = 'e5f1a8b3c926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_notifications_user_unread_created_at', 'notifications',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        postgresql_where=sa.text('NOT is_read'), sqlite_where=sa.text('NOT is_read'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_unread_created_at', table_name='notifications')
@@ -1 +1,14 @@
-from .tasks import create_recurring_tasks, send_task_reminders
\ No newline at end of file
+from .tasks import (
+    create_recurring_tasks,
+    create_recurring_tasks_shard,
+    send_task_reminders,
+    send_task_reminders_shard,
+    purge_notifications,
+    purge_notifications_shard,
+    maintain_notification_partitions,
+    summarize_shards,
+    release_job_lock,
+    claim_job,
+    abandon_job,
+    get_job_meta
+)
\ No newline at end of file
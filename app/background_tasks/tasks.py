@@ -1,78 +1,521 @@
 # app/background_jobs/tasks.py
 
+import json
+import re
+import time
 from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+from celery import chord
+from sqlalchemy import select, insert, update, delete, text, and_, or_
+from sqlalchemy.exc import SQLAlchemyError
 from app.models.task import Task, TaskStatus, RecurringInterval
+from app.models.notification import Notification
 from app.database import SessionLocal
-from app.utils import send_notification
+from app.config import settings
+from app.utils import (
+    logger,
+    send_notifications_bulk,
+    bump_generations_sync,
+    sync_redis_client
+)
 from ..celery import celery_app
 
+# Time between two occurrences of a recurring task
+RECURRENCE_DELTAS = {
+    RecurringInterval.DAILY: timedelta(days=1),
+    RecurringInterval.BI_WEEKLY: timedelta(weeks=2),
+    RecurringInterval.WEEKLY: timedelta(weeks=1),
+    RecurringInterval.MONTHLY: timedelta(days=30),  # Approximate month
+    RecurringInterval.QUARTERLY: timedelta(days=90),  # Approximate quarter
+    RecurringInterval.YEARLY: timedelta(days=365),
+}
+
+RECURRING_BATCH_SIZE = 1000  # Recurring tasks read, inserted and committed together
+
+
+def pending_occurrences(next_at: datetime, delta: timedelta, now: datetime, horizon: datetime) -> tuple[list[datetime], datetime]:
+    """
+    List the occurrences due up to `horizon`, starting at `next_at`.
+
+    Occurrences missed before `now` (e.g. while the job was not running) collapse
+    into the earliest one instead of being back-filled one by one.
+
+    Returns:
+        tuple[list[datetime], datetime]: Due dates to create, and the next occurrence after them.
+    """
+    due_dates = []
+    while next_at <= horizon:
+        if next_at >= now or not due_dates:
+            due_dates.append(next_at)
+        next_at += delta
+    return due_dates, next_at
+
+
+def shard_bounds(shard: int, shard_count: int) -> tuple[UUID, UUID | None]:
+    """
+    Split the user id space into `shard_count` equal ranges and return the bounds of one.
+
+    User ids are random UUIDs, so equal ranges hold roughly equal numbers of users.
+
+    Returns:
+        tuple[UUID, UUID | None]: Inclusive lower bound and exclusive upper bound (None for the last shard).
+    """
+    size = (1 << 128) // shard_count
+    upper = None if shard == shard_count - 1 else UUID(int=(shard + 1) * size)
+    return UUID(int=shard * size), upper
+
+
+def in_shard(column, shard: int, shard_count: int):
+    """Filter `column` (a user id column) to the range of one shard."""
+    lower, upper = shard_bounds(shard, shard_count)
+    if upper is None:
+        return column >= lower
+    return and_(column >= lower, column < upper)
+
+
+def _job_meta_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def claim_job(job: str) -> tuple[str, bool]:
+    """
+    Reserve the single in-flight run of `job`.
+
+    The reservation is a Redis key holding the run's id. It is released by
+    `summarize_shards` (or `release_job_lock` if a shard fails), and expires
+    after `JOB_LOCK_TTL` seconds should the run be lost altogether.
+
+    Returns:
+        tuple[str, bool]: ID of the new run and True, or ID of the run in flight and False.
+    """
+    job_id = str(uuid4())
+    if sync_redis_client.set(f"job-lock:{job}", job_id, nx=True, ex=settings.JOB_LOCK_TTL):
+        meta = {"job": job, "requested_at": datetime.now().isoformat()}
+        sync_redis_client.set(_job_meta_key(job_id), json.dumps(meta), ex=settings.CELERY_RESULT_EXPIRES)
+        return job_id, True
+    return sync_redis_client.get(f"job-lock:{job}"), False
+
+
+@celery_app.task(ignore_result=True)
+def release_job_lock(job: str, job_id: str):
+    """Release the reservation of `job` if it is still held by run `job_id`."""
+    if sync_redis_client.get(f"job-lock:{job}") == job_id:
+        sync_redis_client.delete(f"job-lock:{job}")
+
+
+def abandon_job(job: str, job_id: str):
+    """Undo `claim_job` for a run that could not be started, so the next trigger can claim the job."""
+    release_job_lock(job, job_id)
+    sync_redis_client.delete(_job_meta_key(job_id))
+
+
+def get_job_meta(job_id: str) -> dict | None:
+    """Return what was recorded about run `job_id` when it was claimed and fanned out."""
+    meta = sync_redis_client.get(_job_meta_key(job_id))
+    return json.loads(meta) if meta else None
+
+
+def fan_out(job: str, shard_task, rows_key: str, shard_count: int | None, job_id: str | None, *args) -> str | None:
+    """
+    Run `shard_task` over every user id shard and summarize the results under `job_id`.
+
+    The summary task gets `job_id` as its id, so the run's report can be fetched
+    with that id once done. Without a `job_id` (e.g. from beat) the run claims
+    the job itself, and is skipped if another run is still in flight.
+
+    Returns:
+        str | None: The run's id, or None if it was skipped.
+    """
+    if job_id is None:
+        job_id, claimed = claim_job(job)
+        if not claimed:
+            logger.info(f"{job}: run {job_id} is still in flight, skipping")
+            return None
+
+    shard_count = shard_count or settings.CELERY_SHARD_COUNT
+    started_at = datetime.now()
+    callback = summarize_shards.s(job, rows_key)
+    callback.link_error(release_job_lock.si(job, job_id))
+    result = chord(
+        shard_task.s(shard, shard_count, started_at.isoformat(), *args)
+        for shard in range(shard_count)
+    )(callback, task_id=job_id)
+
+    # Record the shard tasks so progress can be reported before the summary exists
+    meta = get_job_meta(job_id) or {"job": job}
+    meta.update(
+        rows_key=rows_key,
+        started_at=started_at.isoformat(),
+        shard_ids=[shard.id for shard in result.parent.results],
+    )
+    sync_redis_client.set(_job_meta_key(job_id), json.dumps(meta), ex=settings.CELERY_RESULT_EXPIRES)
+    return job_id
+
+
+@celery_app.task(bind=True)
+def summarize_shards(self, results: list[dict], job: str, rows_key: str) -> dict:
+    """
+    Combine the results of a job's shard tasks into one summary, and release the job.
+
+    Counters are summed; `seconds` is the slowest shard, since shards run in parallel.
+    """
+    seconds = max(result["seconds"] for result in results)
+    summary = {"job": job, "shards": len(results)}
+    for key, value in results[0].items():
+        if key != "shard" and isinstance(value, int) and not isinstance(value, bool):
+            summary[key] = sum(result[key] for result in results)
+    summary["seconds"] = seconds
+    summary["rows_per_second"] = round(summary[rows_key] / seconds, 1) if seconds > 0 else 0.0
+    summary["shard_results"] = results
+
+    logger.info(
+        f"{job}: {summary[rows_key]} rows over {len(results)} shards "
+        f"in {seconds:.2f}s ({summary['rows_per_second']:.1f} rows/s)"
+    )
+    release_job_lock(job, self.request.id)
+    return summary
+
+
+@celery_app.task(ignore_result=True)
+def create_recurring_tasks(shard_count: int | None = None, batch_size: int = RECURRING_BATCH_SIZE, job_id: str | None = None):
+    """
+    Fan `create_recurring_tasks_shard` out over `shard_count` user id ranges.
+
+    The shards run in parallel on any free workers; `summarize_shards` collects
+    their results once all of them have finished. Only one run is in flight at a time.
+
+    The coordinator's own result is not stored; the summary task's is.
+
+    Returns:
+        str | None: ID of the run, which is also the summary task's id, or None if skipped.
+    """
+    return fan_out("create_recurring_tasks", create_recurring_tasks_shard, "created", shard_count, job_id, batch_size)
+
+
 @celery_app.task
-def create_recurring_tasks():
-    """Automatically create recurring tasks based on their intervals."""
+def create_recurring_tasks_shard(shard: int, shard_count: int, now: str, batch_size: int = RECURRING_BATCH_SIZE):
+    """
+    Create the occurrences of recurring tasks that fall within the scheduling horizon,
+    for the users in one shard.
+
+    Each recurring task records the due date of its next occurrence in
+    `next_occurrence_at`. A run only reads tasks whose next occurrence is within
+    `RECURRENCE_HORIZON_HOURS` (through a partial index), creates those occurrences
+    and moves the marker past the horizon in the same transaction, so re-running
+    the job creates nothing twice. Tasks not yet scheduled start one interval
+    after their due date. Work is done in batches of `batch_size`, each committed
+    on its own.
+
+    Returns:
+        dict: Tasks created, recurring tasks scheduled, batches committed, elapsed seconds
+        and rows created per second.
+    """
     db = SessionLocal()
-    now = datetime.now()
-    tasks = db.query(Task).filter(Task.is_recurring == True).all()
-
-    for task in tasks:
-        interval = task.recurrence_interval
-
-        # Calculate the next due date based on the recurrence interval
-        if interval == RecurringInterval.DAILY.value:
-            next_due_date = task.due_date + timedelta(days=1)
-        elif interval == RecurringInterval.BI_WEEKLY.value:
-            next_due_date = task.due_date + timedelta(weeks=2)
-        elif interval == RecurringInterval.WEEKLY.value:
-            next_due_date = task.due_date + timedelta(weeks=1)
-        elif interval == RecurringInterval.MONTHLY.value:
-            next_due_date = task.due_date + timedelta(days=30)  # Approximate month
-        elif interval == RecurringInterval.QUARTERLY.value:
-            next_due_date = task.due_date + timedelta(days=90)  # Approximate quarter
-        elif interval == RecurringInterval.YEARLY.value:
-            next_due_date = task.due_date + timedelta(days=365)
-        else:
-            continue
-
-        # Create a new task for the next interval
-        new_task = Task(
-            title=task.title,
-            description=task.description,
-            due_date=next_due_date,
-            is_recurring=False,  # Newly created tasks are not recurring
-            status=TaskStatus.PENDING,
-            user_id=task.user_id,
-            priority=task.priority,
-        )
-        db.add(new_task)
+    start = time.perf_counter()
+    now = datetime.fromisoformat(now)
+    horizon = now + timedelta(hours=settings.RECURRENCE_HORIZON_HOURS)
+    created = scheduled = batches = 0
+
+    try:
+        while True:
+            # Scheduled rows leave the window once their marker moves past the horizon
+            rows = db.execute(
+                select(
+                    Task.id, Task.title, Task.description, Task.due_date, Task.priority,
+                    Task.recurrence_interval, Task.next_occurrence_at, Task.user_id,
+                )
+                .where(
+                    in_shard(Task.user_id, shard, shard_count),
+                    Task.is_recurring == True,
+                    Task.recurrence_interval.is_not(None),
+                    or_(Task.next_occurrence_at <= horizon, Task.next_occurrence_at.is_(None)),
+                )
+                .order_by(Task.next_occurrence_at, Task.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)  # Concurrent runs split the work instead of duplicating it
+            ).all()
+            if not rows:
+                break
+
+            new_tasks, markers = [], []
+            for row in rows:
+                delta = RECURRENCE_DELTAS[row.recurrence_interval]
+                due_dates, next_at = pending_occurrences(
+                    row.next_occurrence_at or row.due_date + delta, delta, now, horizon
+                )
+                new_tasks.extend(
+                    {
+                        "title": row.title,
+                        "description": row.description,
+                        "due_date": due_date,
+                        "is_recurring": False,  # Newly created tasks are not recurring
+                        "status": TaskStatus.PENDING,
+                        "user_id": row.user_id,
+                        "priority": row.priority,
+                    }
+                    for due_date in due_dates
+                )
+                markers.append({"id": row.id, "next_occurrence_at": next_at})
+
+            if new_tasks:
+                db.execute(insert(Task), new_tasks)
+            db.execute(update(Task), markers)
+            db.commit()
+            created += len(new_tasks)
+            scheduled += len(markers)
+            batches += 1
+
+            # Readers must not see task lists cached before the new occurrences existed
+            bump_generations_sync({row.user_id for row in rows})
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    rows_per_second = created / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"create_recurring_tasks shard {shard}/{shard_count}: created {created} tasks for {scheduled} "
+        f"recurring tasks in {batches} batches in {elapsed:.2f}s ({rows_per_second:.1f} rows/s)"
+    )
+    return {
+        "shard": shard,
+        "created": created,
+        "scheduled": scheduled,
+        "batches": batches,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_per_second, 1),
+    }
+
+REMINDER_CHUNK_SIZE = 500  # Notifications written per INSERT and commit
+
+
+@celery_app.task(ignore_result=True)
+def send_task_reminders(shard_count: int | None = None, chunk_size: int = REMINDER_CHUNK_SIZE, job_id: str | None = None):
+    """
+    Fan `send_task_reminders_shard` out over `shard_count` user id ranges.
+
+    Only one run is in flight at a time.
+
+    Returns:
+        str | None: ID of the run, which is also the summary task's id, or None if skipped.
+    """
+    return fan_out("send_task_reminders", send_task_reminders_shard, "sent", shard_count, job_id, chunk_size)
 
-    db.commit()
-    db.close()
 
 @celery_app.task
-def send_task_reminders():
-    """Send reminders for tasks due within the next hour."""
+def send_task_reminders_shard(shard: int, shard_count: int, now: str, chunk_size: int = REMINDER_CHUNK_SIZE):
+    """
+    Send reminders for tasks due within the next hour, for the users in one shard.
+
+    Each task is reminded once per due date: `last_reminded_at` is stamped in the
+    same transaction as its notification, and only tasks not yet reminded are read.
+    Tasks overdue by more than `REMINDER_LOOKBACK_HOURS` are left alone, so a run
+    only scans the `(status, due_date)` range entering the window.
+
+    Returns:
+        dict: Reminders sent and failed, failures per chunk, elapsed seconds and rows per second.
+    """
     db = SessionLocal()
-    now = datetime.now()
+    now = datetime.fromisoformat(now)
     reminder_time = now + timedelta(hours=1)
 
-    tasks = db.query(Task).filter(
-        Task.due_date <= reminder_time,
-        Task.status == TaskStatus.PENDING
-    ).all()
-
-    sent_notifications = []
-    for task in tasks:
-        try:
-            send_notification(
-                db=db,
-                user_id=task.user_id,
-                message=f"Reminder: Task '{task.title}' is due at {task.due_date}.",
-                task_id=task.id
+    def mark_reminded(db, rows: list[dict]):
+        db.execute(update(Task), [{"id": row["task_id"], "last_reminded_at": now} for row in rows])
+
+    try:
+        tasks = db.execute(
+            select(Task.id, Task.title, Task.due_date, Task.user_id).where(
+                in_shard(Task.user_id, shard, shard_count),
+                Task.status == TaskStatus.PENDING,
+                Task.due_date > now - timedelta(hours=settings.REMINDER_LOOKBACK_HOURS),
+                Task.due_date <= reminder_time,
+                Task.last_reminded_at.is_(None),
             )
-            sent_notifications.append(task.id)  # Collect the task ID
-        except Exception as e:
-            # Log the error or handle it
-            print(f"Failed to send notification for task {task.id}: {e}")
+        ).all()
+
+        stats = send_notifications_bulk(
+            db,
+            (
+                {
+                    "user_id": task.user_id,
+                    "message": f"Reminder: Task '{task.title}' is due at {task.due_date}.",
+                    "task_id": task.id,
+                }
+                for task in tasks
+            ),
+            chunk_size=chunk_size,
+            on_chunk=mark_reminded,
+        )
+    finally:
+        db.close()
+
+    logger.info(
+        f"send_task_reminders shard {shard}/{shard_count}: sent {stats['sent']} reminders, "
+        f"{stats['failed']} failed, in {stats['seconds']:.2f}s ({stats['rows_per_second']:.1f} rows/s)"
+    )
+    return {"shard": shard, **stats, "count": stats["sent"]}
+
+
+NOTIFICATION_PURGE_BATCH_SIZE = 5000  # Notifications deleted per statement and commit
+NOTIFICATION_PURGE_MAX_BATCHES = 200  # Batches per shard and run, so a large backlog is spread over runs
+
+
+@celery_app.task(ignore_result=True)
+def purge_notifications(shard_count: int | None = None, batch_size: int = NOTIFICATION_PURGE_BATCH_SIZE, job_id: str | None = None):
+    """
+    Fan `purge_notifications_shard` out over `shard_count` user id ranges.
+
+    Only one run is in flight at a time.
+
+    Returns:
+        str | None: ID of the run, which is also the summary task's id, or None if skipped.
+    """
+    return fan_out("purge_notifications", purge_notifications_shard, "deleted", shard_count, job_id, batch_size)
+
+
+@celery_app.task
+def purge_notifications_shard(
+    shard: int,
+    shard_count: int,
+    now: str,
+    batch_size: int = NOTIFICATION_PURGE_BATCH_SIZE,
+    max_batches: int = NOTIFICATION_PURGE_MAX_BATCHES,
+):
+    """
+    Delete read notifications older than `NOTIFICATION_RETENTION_DAYS`, for the users in one shard.
+
+    Rows are deleted oldest first in batches of `batch_size`, each committed on
+    its own, so no statement holds locks on more than one batch. A run stops
+    after `max_batches`; the next run picks up where it left off. Unread
+    notifications are left alone.
+
+    Returns:
+        dict: Notifications deleted, batches committed, elapsed seconds and rows deleted per second.
+    """
+    db = SessionLocal()
+    start = time.perf_counter()
+    cutoff = datetime.fromisoformat(now) - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    deleted = batches = 0
+
+    try:
+        while batches < max_batches:
+            # Served by the partial created_at WHERE is_read index
+            expired = (
+                select(Notification.id)
+                .where(
+                    in_shard(Notification.user_id, shard, shard_count),
+                    Notification.is_read == True,
+                    Notification.created_at < cutoff,
+                )
+                .order_by(Notification.created_at)
+                .limit(batch_size)
+            )
+            # The created_at bound lets PostgreSQL skip partitions newer than the cutoff
+            result = db.execute(
+                delete(Notification)
+                .where(Notification.created_at < cutoff, Notification.id.in_(expired))
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount
+            batches += 1
+            if result.rowcount < batch_size:
+                break
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    rows_per_second = deleted / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"purge_notifications shard {shard}/{shard_count}: deleted {deleted} notifications "
+        f"in {batches} batches in {elapsed:.2f}s ({rows_per_second:.1f} rows/s)"
+    )
+    return {
+        "shard": shard,
+        "deleted": deleted,
+        "batches": batches,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows_per_second, 1),
+    }
+
+
+NOTIFICATION_PARTITION_NAME = re.compile(r"^notifications_y(\d{4})m(\d{2})$")
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Return the first day of the month `months` after the month of `value`."""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def notification_partition_name(month: datetime) -> str:
+    return f"notifications_y{month.year:04d}m{month.month:02d}"
+
+
+@celery_app.task
+def maintain_notification_partitions(now: str | None = None) -> dict:
+    """
+    Keep the monthly partitions of `notifications` ahead of time, and drop expired ones.
+
+    Partitions for the current month and the next `NOTIFICATION_PARTITIONS_AHEAD`
+    months are created if missing, so rows never pile up in the default partition.
+    Partitions whose whole month is older than `NOTIFICATION_MAX_AGE_DAYS` are
+    detached and dropped, which costs no more than dropping a table, provided
+    they hold no unread notifications. Unread notifications are never removed;
+    a partition holding some is kept until they are read and purged.
+
+    Does nothing unless the table is partitioned (PostgreSQL after the
+    `partition notifications by month` migration).
+
+    Returns:
+        dict: Names of the partitions created and dropped, and whether the table is partitioned.
+    """
+    now = datetime.fromisoformat(now) if now else datetime.now()
+    created, dropped, kept = [], [], []
+    db = SessionLocal()
+    try:
+        if db.get_bind().dialect.name != "postgresql" or db.scalar(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass('notifications')")
+        ) != "p":
+            return {"partitioned": False, "created": created, "dropped": dropped, "kept": kept}
+
+        partitions = set(db.scalars(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'notifications'::regclass"
+        )))
+
+        for months in range(settings.NOTIFICATION_PARTITIONS_AHEAD + 1):
+            month = add_months(now, months)
+            name = notification_partition_name(month)
+            if name in partitions:
+                continue
+            try:
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF notifications "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                db.commit()
+                created.append(name)
+            except SQLAlchemyError as e:
+                # e.g. the default partition already holds rows of this month
+                db.rollback()
+                logger.error(f"Failed to create notification partition {name}: {e}")
 
-    db.close()
-    return {"sent_notifications": sent_notifications, "count": len(sent_notifications)}
+        cutoff = now - timedelta(days=settings.NOTIFICATION_MAX_AGE_DAYS)
+        for name in sorted(partitions):
+            match = NOTIFICATION_PARTITION_NAME.match(name)
+            if match is None or add_months(datetime(int(match[1]), int(match[2]), 1), 1) > cutoff:
+                continue
+            # Detaching locks the partition, so no notification can turn unread again before it is dropped
+            db.execute(text(f"ALTER TABLE notifications DETACH PARTITION {name}"))
+            if db.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {name} WHERE NOT is_read)")):
+                db.rollback()
+                kept.append(name)
+                continue
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            dropped.append(name)
+    finally:
+        db.close()
 
+    logger.info(f"maintain_notification_partitions: created {created}, dropped {dropped}, kept {kept} with unread notifications")
+    return {"partitioned": True, "created": created, "dropped": dropped, "kept": kept}
@@ -1,13 +1,62 @@
 from celery import Celery
+from celery.signals import worker_process_init
+from kombu import Queue
+from app.config import settings
+from app.database import engine
 
 celery_app = Celery(
     "tasks",
-    broker="redis://localhost:6379/0",  # Use your Redis URL
-    backend="redis://localhost:6379/0"
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.background_tasks.tasks"],
 )
-celery_app.autodiscover_tasks()
 
 celery_app.conf.update(
     timezone="UTC",
-    enable_utc=True
-)
\ No newline at end of file
+    enable_utc=True,
+    # Hand workers one task at a time and acknowledge it only once done, so a long
+    # shard is not hoarded by a busy worker and is redelivered if the worker dies.
+    # The shard tasks are idempotent, which makes redelivery safe.
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
+    # Long-running shards get their own queues so they cannot starve other tasks
+    task_default_queue="default",
+    task_queues=(
+        Queue("default"),
+        Queue("recurring"),
+        Queue("reminders"),
+        Queue("maintenance"),
+    ),
+    task_routes={
+        "app.background_tasks.tasks.create_recurring_tasks_shard": {"queue": "recurring"},
+        "app.background_tasks.tasks.send_task_reminders_shard": {"queue": "reminders"},
+        "app.background_tasks.tasks.purge_notifications_shard": {"queue": "maintenance"},
+        "app.background_tasks.tasks.maintain_notification_partitions": {"queue": "maintenance"},
+    },
+    beat_schedule={
+        "create-recurring-tasks": {
+            "task": "app.background_tasks.tasks.create_recurring_tasks",
+            "schedule": settings.RECURRING_TASKS_INTERVAL,
+        },
+        "send-task-reminders": {
+            "task": "app.background_tasks.tasks.send_task_reminders",
+            "schedule": settings.TASK_REMINDERS_INTERVAL,
+        },
+        "purge-notifications": {
+            "task": "app.background_tasks.tasks.purge_notifications",
+            "schedule": settings.NOTIFICATION_RETENTION_INTERVAL,
+        },
+        "maintain-notification-partitions": {
+            "task": "app.background_tasks.tasks.maintain_notification_partitions",
+            "schedule": settings.NOTIFICATION_RETENTION_INTERVAL,
+        },
+    },
+)
+
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """Give each forked worker process its own connection pool."""
+    engine.dispose(close=False)
@@ -13,9 +13,61 @@ class Settings(BaseSettings):
     DEBUG: bool = ENVIRONMENT == "development"
 
     DATABASE_URL: str =os.getenv("DATABASE_URL")
+    ASYNC_DATABASE_URL: str | None = os.getenv("ASYNC_DATABASE_URL")  # Derived from DATABASE_URL when unset
+
+    # Connection pool settings for the API process (async engine)
+    API_DB_POOL_SIZE: int = 10
+    API_DB_MAX_OVERFLOW: int = 20
+    API_DB_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a connection before failing
+    API_DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    API_DB_POOL_PRE_PING: bool = True  # Test connections on checkout to survive failovers
+
+    # Connection pool settings for Celery workers (sync engine)
+    WORKER_DB_POOL_SIZE: int = 2
+    WORKER_DB_MAX_OVERFLOW: int = 2
+    WORKER_DB_POOL_TIMEOUT: float = 60.0
+    WORKER_DB_POOL_RECYCLE: int = 1800
+    WORKER_DB_POOL_PRE_PING: bool = True
+
+    # Background job settings
+    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    CELERY_RESULT_EXPIRES: int = 3600  # Seconds job results are kept in the result backend
+    CELERY_PREFETCH_MULTIPLIER: int = 1  # Tasks reserved per worker process
+    JOB_LOCK_TTL: int = 3600  # Seconds before a lost job run stops blocking new ones
+    RECURRING_TASKS_INTERVAL: int = 3600  # Seconds between scheduled recurring task runs
+    TASK_REMINDERS_INTERVAL: int = 300  # Seconds between scheduled reminder runs
+    CELERY_SHARD_COUNT: int = 8  # User id ranges the periodic jobs are split into
+    RECURRENCE_HORIZON_HOURS: int = 24  # How far ahead recurring task occurrences are created
+    REMINDER_LOOKBACK_HOURS: int = 24  # Overdue tasks older than this are never reminded
+    NOTIFICATION_RETENTION_INTERVAL: int = 86400  # Seconds between notification retention runs
+    NOTIFICATION_RETENTION_DAYS: int = 30  # Read notifications older than this are purged
+    NOTIFICATION_MAX_AGE_DAYS: int = 365  # Monthly partitions older than this are dropped once they hold no unread notifications
+    NOTIFICATION_PARTITIONS_AHEAD: int = 3  # Future monthly partitions kept ready
+
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    LOCAL_CACHE_ENABLED: bool = True  # In-process L1 in front of Redis for opted-in key prefixes
+    LOCAL_CACHE_SIZE: int = 5000
+    LOCAL_CACHE_TTL: int = 30  # Upper bound on L1 staleness should an invalidation be lost
+    CACHE_RAW_RESPONSES: bool = True  # Return cached read endpoints as stored JSON, skipping validation
+    UNREAD_COUNT_TTL: int = 3600  # Seconds before an unread counter is recounted from the database
+    NOTIFICATION_STREAM_HEARTBEAT: int = 15  # Seconds between keep-alive comments on idle notification streams
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = 100  # Undelivered events buffered per stream before the oldest is dropped
+    NOTIFICATION_STREAM_RETRY_MS: int = 3000  # Reconnect delay advertised to clients of notification streams
+    DEPENDENCY_GRAPH_CACHE_SIZE: int = 1000  # Users whose dependency graph is held in memory per process
+    DEPENDENCY_GRAPH_CACHE_TTL: int = 300  # Seconds before a dependency graph is rebuilt from the database
 
     # JWT and authentication settings
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "myjwtsecretkey")  # Default secret
+    AUTH_CACHE_SIZE: int = 10000  # Tokens kept in the per-process authentication cache
+    AUTH_CACHE_TTL: int = 60  # Seconds a cached token -> user lookup stays valid
+    AUTH_CACHE_REDIS: bool = False  # Share cached lookups between workers through Redis
+    BCRYPT_ROUNDS: int = 12  # Cost of new password hashes; hashes of another cost are rehashed on login
+    PASSWORD_HASH_WORKERS: int = min(4, os.cpu_count() or 1)  # Threads hashing and verifying passwords per process
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Password operations running or queued per process
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 5.0  # Seconds a login waits for a free slot before failing with 503
+
+    METRICS_TOKEN: str | None = os.getenv("METRICS_TOKEN")  # Bearer token for /metrics; the endpoints are not mounted without it
 
     # Other security settings
     ALLOWED_HOSTS: list = ["*"]
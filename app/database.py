@@ -1,17 +1,169 @@
 # app/database.py
 
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from app.config import settings
 
 DATABASE_URL = settings.DATABASE_URL
 
-# Create the database engine
-engine = create_engine(DATABASE_URL)
+# Async drivers used for the API when ASYNC_DATABASE_URL is not set explicitly
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Derive the async driver URL from the sync DATABASE_URL."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or get_async_database_url(DATABASE_URL)
+
+
+class PoolMetrics:
+    """
+    Counters for a connection pool, reported by the `/metrics/db-pool` endpoint.
+
+    Attributes:
+        acquisitions (int): Connections handed out by the pool.
+        timeouts (int): Checkouts that gave up after the pool timeout.
+        connects (int): New DBAPI connections opened.
+        invalidations (int): Connections discarded as stale or broken.
+        wait_time_total (float): Seconds spent waiting for a connection, summed.
+        wait_time_max (float): Longest single wait for a connection, in seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.acquisitions += 1
+            self.wait_time_total += seconds
+            self.wait_time_max = max(self.wait_time_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool) -> dict:
+        """Combine the counters with the live state of `pool`."""
+        with self._lock:
+            waits = self.acquisitions + self.timeouts
+            stats = {
+                "acquisitions": self.acquisitions,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "wait_time_avg_ms": round(self.wait_time_total / waits * 1000, 3) if waits else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                pool_size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return stats
+
+
+api_pool_metrics = PoolMetrics()
+worker_pool_metrics = PoolMetrics()
+
+
+class MeasuredPoolMixin:
+    """Times every checkout so waits for a free connection show up in `PoolMetrics`."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class APIPool(MeasuredPoolMixin, AsyncAdaptedQueuePool):
+    metrics = api_pool_metrics
+
+
+class WorkerPool(MeasuredPoolMixin, QueuePool):
+    metrics = worker_pool_metrics
+
+
+def get_pool_options(profile: str, poolclass) -> dict:
+    """
+    Build engine pool arguments from the `API_*` or `WORKER_*` settings profile.
+
+    SQLite keeps SQLAlchemy's default pool since it does not support sizing.
+    """
+    if make_url(DATABASE_URL).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": getattr(settings, f"{profile}_DB_POOL_SIZE"),
+        "max_overflow": getattr(settings, f"{profile}_DB_MAX_OVERFLOW"),
+        "pool_timeout": getattr(settings, f"{profile}_DB_POOL_TIMEOUT"),
+        "pool_recycle": getattr(settings, f"{profile}_DB_POOL_RECYCLE"),
+        "pool_pre_ping": getattr(settings, f"{profile}_DB_POOL_PRE_PING"),
+    }
+
+
+def track_pool_events(engine, metrics: PoolMetrics):
+    """Count connects and invalidations on the engine's pool."""
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.record_connect()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.record_invalidation()
+
+
+# Create the database engine (used by Celery jobs and migrations)
+engine = create_engine(DATABASE_URL, **get_pool_options("WORKER", WorkerPool))
+
+# Create the async database engine used by the API routers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **get_pool_options("API", APIPool))
+
+track_pool_events(engine, worker_pool_metrics)
+track_pool_events(async_engine.sync_engine, api_pool_metrics)
 
 # Create a session local for handling database sessions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions keep attributes loaded after commit so responses can be built without lazy IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for declarative models
 Base = declarative_base()
 
@@ -22,3 +174,16 @@ def get_db():
         yield db  # Return the session to the calling function
     finally:
         db.close()  # Ensure the session is closed after usage
+
+# Dependency to get an async database session for route functions
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db  # The session is closed when the request finishes
+
+
+def get_pool_stats() -> dict:
+    """Report live pool state and counters for the API and worker engines."""
+    return {
+        "api": api_pool_metrics.snapshot(async_engine.pool),
+        "worker": worker_pool_metrics.snapshot(engine.pool),
+    }
@@ -4,10 +4,11 @@ from fastapi import FastAPI,Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_limiter import FastAPILimiter
 from redis.asyncio import Redis
+import asyncio
 from contextlib import asynccontextmanager
-from app.database import engine, Base
+from app.database import engine, async_engine, Base
 from app.config import settings
-from app.utils import logger
+from app.utils import logger, listen_for_invalidations, notification_hub
 from app.routers import (
     auth_router,
     task_router,
@@ -15,7 +16,8 @@ from app.routers import (
     api_key_router,
     automation_router,
     dependency_router,
-    recurrence_router
+    recurrence_router,
+    metrics_router
 )
 
 # Create the FastAPI application
@@ -23,13 +25,18 @@ from app.routers import (
 async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
     print("Starting up the application...")
-    redis = Redis.from_url("redis://localhost", decode_responses=True)
+    redis = Redis.from_url(settings.REDIS_URL, decode_responses=True)
     await FastAPILimiter.init(redis)
     Base.metadata.create_all(bind=engine)
+    # Keep this worker's in-process cache coherent with writes made by other workers
+    invalidation_listener = asyncio.create_task(listen_for_invalidations())
     try:
         yield
     finally:
         print("Shutting down the application...")
+        invalidation_listener.cancel()
+        await notification_hub.close()
+        await async_engine.dispose()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -56,6 +63,8 @@ app.include_router(dependency_router, prefix="/dependent-tasks", tags=["Dependen
 app.include_router(automation_router, prefix="/automation", tags=["Automation"])
 app.include_router(notification_router, prefix="/notification", tags=["Notification"])
 app.include_router(api_key_router, prefix="/api-key", tags=["API Key"])
+if settings.METRICS_TOKEN:
+    app.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
 
 # Middleware
 @app.middleware("http")
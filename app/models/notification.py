@@ -2,7 +2,7 @@
 
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -20,6 +20,11 @@ class Notification(Base):
         is_read (Boolean): Indicates whether the notification has been read.
         created_at (DateTime): Timestamp of notification creation.
         sent_at (DateTime): Timestamp of when the notification was sent.
+
+    The primary key is `(id, created_at)` because on PostgreSQL the table is
+    partitioned by `created_at` month (see the `partition notifications by month`
+    migration), and partition keys must be part of the primary key. `id` alone
+    is still unique in practice.
     """
 
     __tablename__ = "notifications"
@@ -29,9 +34,26 @@ class Notification(Base):
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id"), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    created_at = Column(DateTime, default=datetime.now, nullable=False, primary_key=True)
     sent_at = Column(DateTime, nullable=True)
 
     # Relationships
     task = relationship("Task", back_populates="notifications")
     user = relationship("User", back_populates="notifications")
+
+
+# Unread inbox of a user, newest first, matching the keyset order of the notification list
+Index(
+    "ix_notifications_user_unread_created_at",
+    Notification.user_id, Notification.created_at.desc(), Notification.id.desc(),
+    postgresql_where=Notification.is_read == False,
+    sqlite_where=Notification.is_read == False,
+)
+
+# Read notifications by age, scanned by the retention job
+Index(
+    "ix_notifications_read_created_at",
+    Notification.created_at,
+    postgresql_where=Notification.is_read == True,
+    sqlite_where=Notification.is_read == True,
+)
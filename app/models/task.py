@@ -2,7 +2,7 @@
 
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, String, DateTime, Boolean, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -44,6 +44,8 @@ class Task(Base):
         priority (Enum): Priority level of the task (e.g., Low, Medium, High).
         is_recurring (Boolean): Indicates if the task is recurring.
         recurrence_interval (Enum): Interval for recurring tasks (e.g., daily, bi-weekly, quarterly).
+        next_occurrence_at (DateTime): Due date of the next occurrence to create for a recurring task.
+        last_reminded_at (DateTime): When a reminder was last sent for the current due date.
         user_id (UUID): Foreign key linking to the user who owns the task.
         created_at (DateTime): Timestamp of task creation.
         updated_at (DateTime): Timestamp of last task update.
@@ -54,6 +56,19 @@ class Task(Base):
     """
 
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination indexes for listing a user's tasks ordered by (due_date, id)
+        Index("ix_tasks_user_due_date_id", "user_id", "due_date", "id"),
+        Index("ix_tasks_user_status_due_date_id", "user_id", "status", "due_date", "id"),
+        Index("ix_tasks_user_priority_due_date_id", "user_id", "priority", "due_date", "id"),
+        # Tasks entering the reminder window, scanned by the reminder job
+        Index("ix_tasks_status_due_date", "status", "due_date"),
+        # Recurring tasks with an occurrence due, scanned by the recurrence job
+        Index(
+            "ix_tasks_recurring_next_occurrence_at", "next_occurrence_at",
+            postgresql_where=text("is_recurring"), sqlite_where=text("is_recurring"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     title = Column(String, nullable=False)
@@ -63,6 +78,8 @@ class Task(Base):
     priority = Column(Enum(TaskPriority), nullable=False, default=TaskPriority.MEDIUM)
     is_recurring = Column(Boolean, default=False, nullable=False)
     recurrence_interval = Column(Enum(RecurringInterval), nullable=True)  # Updated to include new intervals
+    next_occurrence_at = Column(DateTime, nullable=True)  # Set by the recurrence job; NULL until first scheduled
+    last_reminded_at = Column(DateTime, nullable=True)  # Set by the reminder job; cleared when the due date changes
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.now, nullable=False)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
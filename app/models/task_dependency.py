@@ -2,7 +2,7 @@
 
 import uuid
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 from app.database import Base
 
 
@@ -17,6 +17,12 @@ class TaskDependency(Base):
     """
 
     __tablename__ = "task_dependencies"
+    __table_args__ = (
+        # One row per edge; also serves lookups of a task's prerequisites
+        Index("ix_task_dependencies_task_id_dependent_task_id", "task_id", "dependent_task_id", unique=True),
+        # Reverse lookups: the tasks depending on a given task
+        Index("ix_task_dependencies_dependent_task_id", "dependent_task_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     task_id = Column(UUID(as_uuid=True), ForeignKey("tasks.id"), nullable=False)
@@ -4,4 +4,5 @@ from .notification import router as notification_router
 from .api_key import router as api_key_router
 from .automation import router as automation_router
 from .task_dependency import router as dependency_router
-from .task_recurrence import router as recurrence_router
\ No newline at end of file
+from .task_recurrence import router as recurrence_router
+from .metrics import router as metrics_router
\ No newline at end of file
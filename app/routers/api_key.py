@@ -1,7 +1,7 @@
 # app/routers/api_key.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from app.schemas import (
     APIKeyResponse,
@@ -14,32 +14,35 @@ from app.utils import (
     hash_password,
     verify_password,
     create_api_key,
-    get_current_user
+    get_current_user,
+    UserSnapshot,
+    invalidate_user_cache
 )
-from app.database import get_db
+from app.database import get_async_db
 
 # Create an instance of APIRouter to handle authentication routes
 router = APIRouter()
 
 @router.post("/regenerate", response_model=APIKeyResponse)
-def regenerate_api_key(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def regenerate_api_key(
+    db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)
 ):
     """
     Regenerates a new API key for the authenticated user.
 
     Args:
-        db (Session): Database session for querying and modifying the database.
-        current_user (User): The currently authenticated user.
+        db (AsyncSession): Database session for querying and modifying the database.
+        current_user (UserSnapshot): The currently authenticated user.
 
     Returns:
         APIKeyResponse: Success message with the new API key.
     """
     try:
+        db_user = await db.get(User, current_user.id)
         new_api_key = create_api_key(data={"sub": current_user.username})
-        current_user.api_key = new_api_key
-        db.commit()
-        db.refresh(current_user)
+        db_user.api_key = new_api_key
+        await db.commit()
+        await invalidate_user_cache(current_user.id)
 
         logger.info(f"API key regenerated for user: {current_user.username}")
         return {
@@ -52,23 +55,24 @@ def regenerate_api_key(
 
 
 @router.post("/revoke", response_model=APIKeyResponse)
-def revoke_api_key(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+async def revoke_api_key(
+    db: AsyncSession = Depends(get_async_db), current_user: UserSnapshot = Depends(get_current_user)
 ):
     """
     Revokes the API key of the authenticated user.
 
     Args:
-        db (Session): Database session for querying and modifying the database.
-        current_user (User): The currently authenticated user.
+        db (AsyncSession): Database session for querying and modifying the database.
+        current_user (UserSnapshot): The currently authenticated user.
 
     Returns:
         APIKeyResponse: Success message confirming revocation.
     """
     try:
-        current_user.api_key = None
-        db.commit()
-        db.refresh(current_user)
+        db_user = await db.get(User, current_user.id)
+        db_user.api_key = None
+        await db.commit()
+        await invalidate_user_cache(current_user.id)
 
         logger.info(f"API key revoked for user: {current_user.username}")
         return {"detail": "API key revoked successfully"}
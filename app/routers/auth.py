@@ -2,7 +2,8 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from app.schemas import (
     UserCreate,
@@ -16,25 +17,36 @@ from app.models import (
 )
 from app.utils import (
     logger,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
     create_api_key,
-    get_current_user
+    get_current_user,
+    UserSnapshot,
+    invalidate_user_cache
 )
-from app.database import get_db
+from app.database import get_async_db
 
 # Create an instance of APIRouter to handle authentication routes
 router = APIRouter()
 
+
+async def rehash_password(db: AsyncSession, db_user: User, new_hash: str | None):
+    """Store the hash computed on login when the stored one used outdated parameters."""
+    if new_hash is None:
+        return
+    db_user.hashed_password = new_hash
+    await db.commit()
+    logger.info(f"Rehashed password of user '{db_user.username}' with current parameters.")
+
 # Register route to create a new user account
 @router.post("/register", response_model=RegisterResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Registers a new user account.
 
     Args: \n
         user (UserCreate): The user data containing the username, email, and password.
-        db (Session): The database session to check for existing users and add new ones.
+        db (AsyncSession): The database session to check for existing users and add new ones.
 
     Raises:
         HTTPException: If the username is already registered.
@@ -43,7 +55,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         User: The newly created user object.
     """
     try:
-        db_user = db.query(User).filter(User.username == user.username).first()
+        db_user = await db.scalar(select(User).where(User.username == user.username))
         if db_user:
             logger.warning(f"Attempt to register with an existing username: {user.username}")
             raise HTTPException(
@@ -51,7 +63,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
                 detail="Username already registered"
             )
 
-        db_email = db.query(User).filter(User.email == user.email).first()
+        db_email = await db.scalar(select(User).where(User.email == user.email))
         if db_email:
             logger.warning(f"Attempt to register with an existing email: {user.email}")
             raise HTTPException(
@@ -60,7 +72,7 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
             )
 
         # Hash the password before storing
-        hashed_password = hash_password(user.password)
+        hashed_password = await hash_password_async(user.password)
 
         # Generate API Key
         api_key = create_api_key(data={"sub": user.username})
@@ -74,17 +86,8 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 
         # Add the new user to the database
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-
-        db_user = (
-            db.query(User)
-            .filter(
-                User.username == user.username, 
-                User.hashed_password == hashed_password
-            )
-            .first()
-        )
+        await db.commit()
+        await db.refresh(new_user)
 
         logger.info(
             f"New user registered successfully: {new_user.username} ({new_user.email})."
@@ -101,13 +104,13 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 
 # Login route for user authentication and token generation
 @router.post("/user/login", response_model=LoginResponse)
-async def user_login(user: UserLogin, db: Session = Depends(get_db)):
+async def user_login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Logs in a user by verifying the username and password, and returning a JWT access token.
 
     Args: \n
         user (UserLogin): The user data containing the email and password.
-        db (Session): The database session to validate user credentials.
+        db (AsyncSession): The database session to validate user credentials.
 
     Raises:
         HTTPException: If the credentials are invalid.
@@ -117,18 +120,21 @@ async def user_login(user: UserLogin, db: Session = Depends(get_db)):
     """
     try:
         # Query the database for the user and verify password
-        db_user = (
-            db.query(User)
-            .filter(User.email == user.email)
-            .first()
+        db_user = await db.scalar(
+            select(User)
+            .where(User.email == user.email)
         )
 
-        if not db_user or not verify_password(user.password, db_user.hashed_password):
+        verified, new_hash = (
+            await verify_and_update_password(user.password, db_user.hashed_password)
+            if db_user else (False, None)
+        )
+        if not verified:
             logger.warning(f"Failed login attempt for email: {user.email}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
             )
-        
+        await rehash_password(db, db_user, new_hash)
 
         #Get API Key
         api_key = db_user.api_key
@@ -146,12 +152,12 @@ async def user_login(user: UserLogin, db: Session = Depends(get_db)):
 
 # Protected route example requiring authentication
 @router.get("/protected-route", response_model=DetailResponse)
-async def protected_route(current_user: User = Depends(get_current_user)):
+async def protected_route(current_user: UserSnapshot = Depends(get_current_user)):
     """
     A protected route that can only be accessed by authenticated users.
 
     Args: \n
-        current_user (User): The currently authenticated user, provided by the `get_current_user` dependency.
+        current_user (UserSnapshot): The currently authenticated user, provided by the `get_current_user` dependency.
 
     Returns:
         dict: A greeting message with the username of the authenticated user.
@@ -166,15 +172,15 @@ async def protected_route(current_user: User = Depends(get_current_user)):
 
 
 @router.delete("/account", response_model=DetailResponse)
-def delete_account(
-    db: Session = Depends(get_db), user: User = Depends(get_current_user)
+async def delete_account(
+    db: AsyncSession = Depends(get_async_db), user: UserSnapshot = Depends(get_current_user)
 ):
     """
     Deletes a user along with their associated data.
 
     Args: \n
-        db (Session): Database session for querying and modifying the database.
-        user (user): The current user.
+        db (AsyncSession): Database session for querying and modifying the database.
+        user (UserSnapshot): The current user.
 
     Raises:
         HTTPException: If the user does not exist.
@@ -183,7 +189,7 @@ def delete_account(
         DetailResponse: Success message confirming the user deletion.
     """
     try:
-        target_user = db.query(User).filter(User.id == user.id).first()
+        target_user = await db.scalar(select(User).where(User.id == user.id))
 
         if not target_user:
             logger.warning(
@@ -193,8 +199,9 @@ def delete_account(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
-        db.delete(target_user)
-        db.commit()
+        await db.delete(target_user)
+        await db.commit()
+        await invalidate_user_cache(user.id)
         logger.info(f"User '{user.username}' deleted account (ID: {user.id}).")
         return {"detail": f"Deleted account of '{target_user.username}' successfully"}
     except SQLAlchemyError as e:
@@ -205,18 +212,24 @@ def delete_account(
 # Login route for user authentication and token generation
 @router.post("/login", include_in_schema=False)
 async def login_for_oauth_form(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
+    form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
 ):
     """Login for /docs . please DO NOT USE THIS ROUTE AT ALL
     """
     try:
-        db_user = db.query(User).filter(User.email == form_data.username).first()
+        db_user = await db.scalar(select(User).where(User.email == form_data.username))
 
-        if not db_user or not verify_password(form_data.password, db_user.hashed_password):
+        verified, new_hash = (
+            await verify_and_update_password(form_data.password, db_user.hashed_password)
+            if db_user else (False, None)
+        )
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid credentials"
             )
 
+        await rehash_password(db, db_user, new_hash)
+
         # Create and return the API Key
         access_token = create_api_key(data={"sub": db_user.username})
         return {
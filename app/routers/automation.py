@@ -1,33 +1,113 @@
 # app/routers/automation.py
 
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi_limiter.depends import RateLimiter
-from sqlalchemy.exc import SQLAlchemyError
-from app.utils import logger, get_current_user, set_cache, get_cache, delete_cache
-from app.database import get_db
-from app.background_tasks import create_recurring_tasks, send_task_reminders
+from celery.result import AsyncResult
+from redis import RedisError
+from app.utils import logger
+from app.background_tasks import (
+    create_recurring_tasks,
+    send_task_reminders,
+    purge_notifications,
+    claim_job,
+    abandon_job,
+    get_job_meta
+)
+from app.celery import celery_app
 # Create an instance of APIRouter to handle task routes
 router = APIRouter()
 
 # Rate Limiting Middleware
 rate_limiter = RateLimiter(times=1000, minutes=1)
 
+
+def trigger_job(job: str, coordinator, message: str) -> dict:
+    """Start `coordinator` unless a run of `job` is already in flight, and return the run's id."""
+    try:
+        job_id, claimed = claim_job(job)
+    except RedisError as e:
+        logger.error(f"Redis error: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job queue unavailable")
+    if not claimed:
+        return {"message": f"{message} already running.", "job_id": job_id, "already_running": True}
+
+    try:
+        coordinator.apply_async(kwargs={"job_id": job_id})  # Trigger the Celery task asynchronously
+    except Exception as e:
+        # Nothing will run under this id, so free the job for the next trigger
+        logger.error(f"Failed to enqueue {job}: {e}")
+        try:
+            abandon_job(job, job_id)
+        except RedisError as e:
+            logger.error(f"Redis error: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job queue unavailable")
+    return {"message": f"{message} triggered.", "job_id": job_id, "already_running": False}
+
+
 @router.post("/reminders", dependencies=[Depends(rate_limiter)])
-async def run_reminders():
+def run_reminders():
     """Triggers a manual reminder for tasks due soon."""
-    try:
-        send_task_reminders.delay()  # Trigger the Celery task asynchronously
-        return {"message": "Reminder task triggered."}
-    except SQLAlchemyError as e:
-        logger.error(f"Database error: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+    return trigger_job("send_task_reminders", send_task_reminders, "Reminder task")
 
 @router.post("/run-recurring", dependencies=[Depends(rate_limiter)])
-async def run_recurring_tasks():
+def run_recurring_tasks():
     """Triggers the manual creation of recurring tasks."""
+    return trigger_job("create_recurring_tasks", create_recurring_tasks, "Recurring tasks creation")
+
+@router.post("/purge-notifications", dependencies=[Depends(rate_limiter)])
+def run_notification_purge():
+    """Triggers the manual purge of read notifications past their retention."""
+    return trigger_job("purge_notifications", purge_notifications, "Notification purge")
+
+@router.get("/jobs/{job_id}", dependencies=[Depends(rate_limiter)])
+def get_job_status(job_id: str):
+    """
+    Report the progress of a triggered job run.
+
+    Args: \n
+        job_id (str): The id returned when the job was triggered.
+
+    Raises:
+        HTTPException: If no run with this id is known.
+
+    Returns:
+        dict: The run's state, shards completed, rows processed so far and duration.
+            Finished runs also include the full summary.
+    """
     try:
-        create_recurring_tasks.delay()  # Trigger the Celery task asynchronously
-        return {"message": "Recurring tasks creation triggered."}
-    except SQLAlchemyError as e:
-        logger.error(f"Database error: {e}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
\ No newline at end of file
+        meta = get_job_meta(job_id)
+    except RedisError as e:
+        logger.error(f"Redis error: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Job queue unavailable")
+    if meta is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    report = {"job_id": job_id, "job": meta["job"], "requested_at": meta.get("requested_at")}
+    if "shard_ids" not in meta:
+        return {**report, "state": "queued"}  # The coordinator has not fanned out yet
+
+    summary = AsyncResult(job_id, app=celery_app)
+    if summary.successful():
+        result = summary.result
+        return {
+            **report,
+            "state": "succeeded",
+            "shards_total": result["shards"],
+            "shards_completed": result["shards"],
+            "rows_processed": result[meta["rows_key"]],
+            "duration_seconds": result["seconds"],
+            "summary": result,
+        }
+
+    shards = [AsyncResult(shard_id, app=celery_app) for shard_id in meta["shard_ids"]]
+    finished = [shard.result for shard in shards if shard.successful()]
+    failed = summary.failed() or any(shard.failed() for shard in shards)
+    return {
+        **report,
+        "state": "failed" if failed else "running",
+        "shards_total": len(shards),
+        "shards_completed": len(finished),
+        "rows_processed": sum(result[meta["rows_key"]] for result in finished),
+        "duration_seconds": round((datetime.now() - datetime.fromisoformat(meta["started_at"])).total_seconds(), 3),
+    }
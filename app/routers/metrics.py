@@ -0,0 +1,105 @@
+# app/routers/metrics.py
+
+import secrets
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.config import settings
+from app.database import get_pool_stats
+from app.utils import (
+    get_auth_cache_stats,
+    get_local_cache_stats,
+    get_dependency_graph_stats,
+    get_notification_stream_stats,
+    get_password_hash_stats
+)
+
+metrics_scheme = HTTPBearer(auto_error=False)
+
+
+def require_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme)):
+    """
+    Only let through requests bearing `METRICS_TOKEN`.
+
+    Raises:
+        HTTPException: If the token is missing or wrong.
+    """
+    if credentials is None or not settings.METRICS_TOKEN or not secrets.compare_digest(
+        credentials.credentials, settings.METRICS_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+# Create an instance of APIRouter to handle metrics routes
+# Metrics expose internals of the deployment, so they are for operators only
+router = APIRouter(dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/db-pool")
+async def get_db_pool_metrics():
+    """
+    Reports connection pool usage for the API and Celery worker engines.
+
+    Returns:
+        dict: Checked-out, checked-in and overflow connections, plus acquisition,
+        timeout and wait-time counters for each pool.
+    """
+    return get_pool_stats()
+
+
+@router.get("/auth-cache")
+async def get_auth_cache_metrics():
+    """
+    Reports hit/miss counters of the token -> user cache used by `get_current_user`.
+
+    Returns:
+        dict: Cache size, hits, misses, evictions, hit ratio and shared Redis hits.
+    """
+    return get_auth_cache_stats()
+
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """
+    Reports usage of this worker's in-process L1 cache in front of Redis.
+
+    Returns:
+        dict: Cache size, hits, misses, evictions, hit ratio and opted-in key prefixes.
+    """
+    return get_local_cache_stats()
+
+
+@router.get("/dependency-graph")
+async def get_dependency_graph_metrics():
+    """
+    Reports usage of this worker's in-memory per-user dependency graphs.
+
+    Returns:
+        dict: Graphs held, hits, misses, evictions and hit ratio.
+    """
+    return get_dependency_graph_stats()
+
+
+@router.get("/notification-streams")
+async def get_notification_stream_metrics():
+    """
+    Reports notification streams open on this worker.
+
+    Returns:
+        dict: Subscribed channels, open streams, and events delivered and dropped.
+    """
+    return get_notification_stream_stats()
+
+
+@router.get("/password-hashing")
+async def get_password_hashing_metrics():
+    """
+    Reports usage of this worker's password hashing pool, used by registration and login.
+
+    Returns:
+        dict: Pool size, operations pending, completed and rejected, and average duration.
+    """
+    return get_password_hash_stats()
@@ -1,12 +1,19 @@
 # app/routers/notification.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import redis
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body, Request
+from fastapi.responses import StreamingResponse
 from uuid import UUID
-from sqlalchemy import desc
+from typing import Optional
+from sqlalchemy import desc, select, update, tuple_
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import (
-    NotificationResponse
+    NotificationResponse,
+    NotificationPage,
+    UnreadCountResponse,
+    MarkReadResult
 )
 from app.models import (
     User,
@@ -14,46 +21,67 @@ from app.models import (
 )
 from app.utils import (
     logger,
-    get_current_user
+    get_current_user,
+    get_current_stream_user,
+    UserSnapshot,
+    encode_cursor,
+    decode_cursor,
+    get_unread_count,
+    adjust_unread_count,
+    notification_hub
 )
-from app.database import get_db
+from app.database import get_async_db
+from app.config import settings
 
 # Create an instance of APIRouter to handle notification routes
 router = APIRouter()
 
 
 # Route to fetch all unread notifications for the authenticated user
-@router.get("/", response_model=list[NotificationResponse])
-def get_notifications(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/", response_model=NotificationPage)
+async def get_notifications(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
     limit: int = Query(
         10, ge=1, le=100, description="Maximum number of notifications to return."
     ),
-    offset: int = Query(0, ge=0, description="Number of notifications to skip."),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page."),
 ):
     """
-    Fetches all unread notifications for the authenticated user.
+    Fetches a page of unread notifications for the authenticated user, newest first.
+
+    Pages are keyed on `(created_at, id)`: pass the `next_cursor` of a page as
+    `cursor` to fetch the following one.
 
     Args: \n
-        db (Session): The database session to interact with the database.
-        current_user (User): The currently authenticated user.
+        db (AsyncSession): The database session to interact with the database.
+        current_user (UserSnapshot): The currently authenticated user.
+        limit (int): Maximum number of notifications to return.
+        cursor (str): Position after which to continue.
 
     Returns:
-        list[NotificationResponse]: A list of unread notifications for the user.
-
-    Raises:
-        HTTPException: If no unread notifications are found.
+        NotificationPage: Unread notifications of the user and the cursor of the next page.
     """
     try:
-        notifications = (
-            db.query(Notification)
-            .filter(Notification.user_id == current_user.id, Notification.is_read == False)
-            .order_by(desc(Notification.id))
-            .offset(offset)
-            .limit(limit)
-            .all()
+        # Served by the partial (user_id, created_at DESC, id DESC) WHERE NOT is_read index
+        query = select(Notification).where(
+            Notification.user_id == current_user.id, Notification.is_read == False
         )
+        if cursor:
+            last_created_at, last_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Notification.created_at, Notification.id) < tuple_(last_created_at, last_id)
+            )
+        notifications = (
+            await db.scalars(
+                query.order_by(desc(Notification.created_at), desc(Notification.id)).limit(limit + 1)
+            )
+        ).all()
+
+        next_cursor = None
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            next_cursor = encode_cursor(notifications[-1].created_at, notifications[-1].id)
 
         # Log the fetched unread notifications
         logger.info(
@@ -65,26 +93,104 @@ def get_notifications(
             logger.warning(
                 f"No unread notifications found for user '{current_user.username}' (ID: {current_user.id})."
             )
-        return notifications
+        return {"items": notifications, "next_cursor": next_cursor}
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 
+# Route to fetch the number of unread notifications, for badges polled by clients
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_notification_count(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Returns the number of unread notifications for the authenticated user.
+
+    The count is read from a Redis counter kept up to date by every write path;
+    the database is only queried when the counter does not exist yet.
+
+    Args: \n
+        db (AsyncSession): The database session, used to rebuild the counter.
+        current_user (UserSnapshot): The currently authenticated user.
+
+    Returns:
+        UnreadCountResponse: The number of unread notifications.
+    """
+    try:
+        return {"unread": await get_unread_count(db, current_user.id)}
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+
+# Route to push new notifications to the client as Server-Sent Events
+@router.get("/stream")
+async def stream_notifications(
+    request: Request,
+    current_user: UserSnapshot = Depends(get_current_stream_user),
+):
+    """
+    Streams the authenticated user's new notifications as Server-Sent Events.
+
+    Each notification created for the user, by any API worker or Celery job, is
+    sent as a `notification` event whose data is the notification JSON. Idle
+    streams receive a keep-alive comment every `NOTIFICATION_STREAM_HEARTBEAT`
+    seconds. Notifications created while the client is disconnected are not
+    replayed; fetch the notification list after reconnecting.
+
+    Args: \n
+        request (Request): The incoming request, polled for client disconnects.
+        current_user (UserSnapshot): The currently authenticated user.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` of notifications.
+    """
+    async def events():
+        try:
+            queue = await notification_hub.subscribe(current_user.id)
+        except redis.RedisError as e:
+            logger.error(f"Error opening notification stream for user {current_user.id}: {e}")
+            yield f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n"
+            return
+
+        logger.info(f"Opened notification stream for user '{current_user.username}' (ID: {current_user.id}).")
+        try:
+            yield f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.NOTIFICATION_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: notification\ndata: {event}\n\n"
+        finally:
+            await notification_hub.unsubscribe(current_user.id, queue)
+            logger.info(f"Closed notification stream for user '{current_user.username}' (ID: {current_user.id}).")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # Route to mark a specific notification as read
 @router.put("/{notification_id}/mark-as-read", response_model=NotificationResponse)
-def mark_notification_as_read(
-    notification_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def mark_notification_as_read(
+    notification_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Marks a specific notification as read for the authenticated user.
 
     Args: \n
-        notification_id (int): The ID of the notification to mark as read.
-        db (Session): The database session to interact with the database.
-        current_user (User): The currently authenticated user.
+        notification_id (UUID): The ID of the notification to mark as read.
+        db (AsyncSession): The database session to interact with the database.
+        current_user (UserSnapshot): The currently authenticated user.
 
     Returns:
         NotificationResponse: The updated notification after marking it as read.
@@ -93,12 +199,11 @@ def mark_notification_as_read(
         HTTPException: If the notification is not found or does not belong to the user.
     """
     try:
-        notification = (
-            db.query(Notification)
-            .filter(
+        notification = await db.scalar(
+            select(Notification)
+            .where(
                 Notification.id == notification_id, Notification.user_id == current_user.id
             )
-            .first()
         )
 
         if not notification:
@@ -107,9 +212,12 @@ def mark_notification_as_read(
             )
             raise HTTPException(status_code=404, detail="Notification not found")
 
+        was_unread = not notification.is_read
         notification.is_read = True  # Mark the notification as read
-        db.commit()  # Commit the update to the database
-        db.refresh(notification)  # Refresh the notification object to get the updated state
+        await db.commit()  # Commit the update to the database
+        await db.refresh(notification)  # Refresh the notification object to get the updated state
+        if was_unread:
+            await adjust_unread_count(current_user.id, -1)
 
         # Log the action of marking the notification as read
         logger.info(
@@ -123,48 +231,117 @@ def mark_notification_as_read(
 
 
 # Route to mark all unread notifications as read
-@router.put("/mark-all-as-read", response_model=list[NotificationResponse])
-def mark_all_notifications_as_read(
-    db: Session = Depends(get_db), current_user: User = Depends(get_current_user)
+@router.put("/mark-all-as-read", response_model=MarkReadResult)
+async def mark_all_notifications_as_read(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+    limit: Optional[int] = Query(
+        None, ge=1, le=100,
+        description="Only mark (and return) the newest `limit` unread notifications.",
+    ),
 ):
     """
     Marks all unread notifications as read for the authenticated user.
 
+    Without `limit` a single UPDATE marks every unread notification and only the
+    count is returned, so the cost does not depend on the size of the backlog
+    beyond the UPDATE itself. With `limit` only the newest page is marked, and
+    the updated notifications are returned.
+
     Args: \n
-        db (Session): The database session to interact with the database.
-        current_user (User): The currently authenticated user.
+        db (AsyncSession): The database session to interact with the database.
+        current_user (UserSnapshot): The currently authenticated user.
+        limit (int): Size of the page to mark and return instead of all notifications.
 
     Returns:
-        list[NotificationResponse]: A list of notifications that were marked as read.
+        MarkReadResult: The number of notifications marked as read, and the page if requested.
 
     Raises:
         HTTPException: If no unread notifications are found.
     """
     try:
-        # Query all unread notifications for the user
-        notifications = (
-            db.query(Notification)
-            .filter(Notification.user_id == current_user.id, Notification.is_read == False)
-            .all()
+        statement = (
+            update(Notification)
+            .where(Notification.user_id == current_user.id, Notification.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
         )
+        if limit is None:
+            updated, items = (await db.execute(statement)).rowcount, []
+        else:
+            newest = (
+                select(Notification.id)
+                .where(Notification.user_id == current_user.id, Notification.is_read == False)
+                .order_by(desc(Notification.created_at), desc(Notification.id))
+                .limit(limit)
+            )
+            items = (await db.scalars(
+                statement.where(Notification.id.in_(newest)).returning(Notification)
+            )).all()
+            items = sorted(items, key=lambda notification: (notification.created_at, notification.id), reverse=True)
+            updated = len(items)
 
-        if not notifications:
+        if not updated:
             logger.warning(f"No unread notifications found for user {current_user.id}.")
             raise HTTPException(status_code=404, detail="No unread notifications found")
 
-        # Mark all fetched notifications as read
-        for notification in notifications:
-            notification.is_read = True
-
-        db.commit()  # Commit the updates to the database
+        await db.commit()  # Commit the updates to the database
+        await adjust_unread_count(current_user.id, -updated)
 
         # Log the action of marking all notifications as read
         logger.info(
-            f"Marked all unread notifications as read for user '{current_user.username}' (ID: {current_user.id}). Total: {len(notifications)}."
+            f"Marked all unread notifications as read for user '{current_user.username}' (ID: {current_user.id}). Total: {updated}."
         )
 
-        # Return the list of updated notifications
-        return notifications
+        return {"updated": updated, "items": items}
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+
+MAX_MARK_READ_IDS = 1000
+
+
+# Route to mark several notifications as read at once
+@router.put("/mark-as-read", response_model=MarkReadResult)
+async def mark_notifications_as_read(
+    notification_ids: list[UUID] = Body(..., max_length=MAX_MARK_READ_IDS),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Marks the given notifications as read for the authenticated user, in a single UPDATE.
+
+    Ids that are unknown, belong to another user or are already read are ignored.
+
+    Args: \n
+        notification_ids (list[UUID]): The IDs of the notifications to mark as read.
+        db (AsyncSession): The database session to interact with the database.
+        current_user (UserSnapshot): The currently authenticated user.
+
+    Returns:
+        MarkReadResult: The number of notifications marked as read, and those notifications.
+    """
+    try:
+        items = (await db.scalars(
+            update(Notification)
+            .where(
+                Notification.user_id == current_user.id,
+                Notification.id.in_(notification_ids),
+                Notification.is_read == False,
+            )
+            .values(is_read=True)
+            .returning(Notification)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await db.commit()
+        if items:
+            await adjust_unread_count(current_user.id, -len(items))
+
+        logger.info(
+            f"Marked {len(items)} notifications as read for user '{current_user.username}' (ID: {current_user.id})."
+        )
+        return {"updated": len(items), "items": items}
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
@@ -1,80 +1,410 @@
 # app/routers/task.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
+from fastapi.responses import StreamingResponse
 from fastapi_limiter.depends import RateLimiter
+import uuid
 from uuid import UUID
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Literal, Optional
+import csv
+import io
+import orjson
+from sqlalchemy import select, insert, update, delete, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from app.schemas import DetailResponse, CreateTask, TaskResponse
-from app.models import User, Task
-from app.utils import logger, get_current_user, set_cache, get_cache, delete_cache
-from app.database import get_db
-import json
+from app.schemas import DetailResponse, NaiveDateTime, CreateTask, TaskResponse, TaskPage, BulkTaskUpdate, BulkTaskError, BulkTaskResult
+from app.models import User, Task, TaskDependency, Notification, TaskStatus, TaskPriority, RecurringInterval
+from app.utils import (
+    logger,
+    get_current_user,
+    UserSnapshot,
+    get_or_compute_response,
+    task_payload,
+    TASK_RESPONSE_FIELDS,
+    enable_local_cache,
+    versioned_key,
+    bump_generation,
+    update_dependency_graph,
+    adjust_unread_count,
+    encode_cursor,
+    decode_cursor
+)
+from app.database import get_async_db, AsyncSessionLocal
+import hashlib
 
 rate_limiter = RateLimiter(times=1000, minutes=1)
 # Create an instance of APIRouter to handle task routes
 router = APIRouter()
 
-@router.get("/", response_model=list[TaskResponse], dependencies= [Depends(rate_limiter)])
+# Serve task list pages and task details from the in-process cache when possible
+enable_local_cache("tasks", "task")
+
+@router.get("/", response_model=TaskPage, dependencies= [Depends(rate_limiter)])
 async def get_tasks(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of tasks to return."),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page."),
+    task_status: Optional[TaskStatus] = Query(None, alias="status", description="Only return tasks with this status."),
+    priority: Optional[TaskPriority] = Query(None, description="Only return tasks with this priority."),
+    is_recurring: Optional[bool] = Query(None, description="Only return recurring or non-recurring tasks."),
+    due_after: Optional[NaiveDateTime] = Query(None, description="Only return tasks due at or after this time."),
+    due_before: Optional[NaiveDateTime] = Query(None, description="Only return tasks due before this time."),
 ):
     """
-    Retrieve all tasks for the current user, with caching.
+    Retrieve a page of tasks for the current user ordered by due date, with caching.
+
+    Pages are keyed on `(due_date, id)`: pass the `next_cursor` of a page as `cursor`
+    to fetch the following one. Each page and filter combination is cached separately.
     """
     try:
-        cache_key = f"tasks:{user.id}"
-        cached_tasks = await get_cache(cache_key)
-
-        if cached_tasks:
-            # Deserialize the cached JSON string into a list of TaskResponse objects
-            tasks_data = json.loads(cached_tasks)  # Deserialize into a list of dicts
-            return [TaskResponse(**task) for task in tasks_data]  # Convert to TaskResponse models
-
-        # Fetch tasks from the database
-        tasks = db.query(Task).filter(Task.user_id == user.id).all()
-        if tasks:
-            # Serialize the tasks and set the cache
-            serialized_tasks = [task.to_dict() for task in tasks]
-            await set_cache(cache_key, serialized_tasks)  # Ensure you serialize to JSON format
-
-        return tasks
+        params = f"{limit}|{cursor}|{task_status}|{priority}|{is_recurring}|{due_after}|{due_before}"
+        cache_key = await versioned_key("tasks", user.id, hashlib.sha1(params.encode()).hexdigest())
+
+        async def load_page():
+            # Filters and the keyset condition run in SQL against the (user_id, ..., due_date, id) indexes
+            query = select(Task).where(Task.user_id == user.id)
+            if task_status is not None:
+                query = query.where(Task.status == task_status)
+            if priority is not None:
+                query = query.where(Task.priority == priority)
+            if is_recurring is not None:
+                query = query.where(Task.is_recurring == is_recurring)
+            if due_after is not None:
+                query = query.where(Task.due_date >= due_after)
+            if due_before is not None:
+                query = query.where(Task.due_date < due_before)
+            if cursor:
+                last_due_date, last_id = decode_cursor(cursor)
+                query = query.where(tuple_(Task.due_date, Task.id) > tuple_(last_due_date, last_id))
+
+            # Fetch one extra row to know whether another page follows
+            result = await db.execute(query.order_by(Task.due_date, Task.id).limit(limit + 1))
+            tasks = result.scalars().all()
+            next_cursor = None
+            if len(tasks) > limit:
+                tasks = tasks[:limit]
+                next_cursor = encode_cursor(tasks[-1].due_date, tasks[-1].id)
+            return {"items": [task_payload(task) for task in tasks], "next_cursor": next_cursor}
+
+        return await get_or_compute_response(cache_key, load_page)
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 
+EXPORT_BATCH_SIZE = 1000  # Rows fetched from the server-side cursor and written per chunk
+
+
+async def export_tasks(user_id: UUID, export_format: str) -> AsyncIterator[bytes]:
+    """
+    Yield a user's tasks as NDJSON or CSV, one chunk per batch of rows.
+
+    Rows come from a server-side cursor, so only one batch is held in memory at a
+    time; the session's identity map only holds weak references, so earlier batches
+    are freed as they are written. The generator opens its own session because it
+    outlives the request's.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await db.stream_scalars(
+                select(Task)
+                .where(Task.user_id == user_id)
+                .order_by(Task.due_date, Task.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=TASK_RESPONSE_FIELDS)
+                writer.writeheader()
+                async for tasks in result.partitions():
+                    writer.writerows(task_payload(task) for task in tasks)
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue().encode()  # Header of an empty export
+            else:
+                async for tasks in result.partitions():
+                    yield b"".join(orjson.dumps(task_payload(task)) + b"\n" for task in tasks)
+        except SQLAlchemyError as e:
+            # The status line is already sent; the client sees a truncated export
+            logger.error(f"Database error during task export: {e}")
+            raise
+
+
+@router.get("/export", dependencies=[Depends(rate_limiter)])
+async def export_all_tasks(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Output format."),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Export all tasks of the current user, ordered by due date, as a streamed download.
+
+    NDJSON has one `TaskResponse` object per line; CSV has one row per task with
+    the same fields as columns. Memory use does not grow with the number of tasks.
+    """
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_tasks(user.id, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{export_format}"'},
+    )
+
+
+# Export and bulk endpoints are declared before "/{task_id}" so their paths are not parsed as task ids
+MAX_BULK_ITEMS = 1000
+
+
+def check_bulk_size(items: list):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ITEMS} items per request",
+        )
+
+
+def task_values(task: CreateTask) -> dict:
+    """Column values for a task, with the recurrence interval resolved to its enum member."""
+    values = task.model_dump()
+    if values["recurrence_interval"] is not None:
+        values["recurrence_interval"] = RecurringInterval(values["recurrence_interval"])
+    return values
+
+
+def single_task_values(task: CreateTask) -> dict:
+    """Like `task_values`, but rejects an unknown recurrence interval with 400."""
+    try:
+        return task_values(task)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid recurrence interval '{task.recurrence_interval}'",
+        )
+
+
+def schedule_resets(current, values: dict) -> dict:
+    """
+    Scheduling markers to clear when an update changes when a task is due or how it recurs.
+
+    A new due date makes the task eligible for a reminder again, and any change to
+    the due date or recurrence makes the recurring task job schedule it afresh.
+
+    Args:
+        current: The stored task (or a row with its `due_date`, `is_recurring` and `recurrence_interval`).
+        values (dict): The task's new column values.
+
+    Returns:
+        dict: Marker columns to set to None.
+    """
+    def interval(value):
+        return value.value if isinstance(value, RecurringInterval) else value
+
+    resets = {}
+    if values["due_date"] != current.due_date:
+        resets["last_reminded_at"] = None
+    if (
+        values["due_date"] != current.due_date
+        or values["is_recurring"] != current.is_recurring
+        or interval(values["recurrence_interval"]) != interval(current.recurrence_interval)
+    ):
+        resets["next_occurrence_at"] = None
+    return resets
+
+
+async def delete_task_notifications(db: AsyncSession, task_ids: Iterable[UUID]) -> int:
+    """
+    Delete the notifications of tasks about to be deleted, which would otherwise violate their foreign key.
+
+    Returns:
+        int: How many of the deleted notifications were unread, to lower the unread counter by once committed.
+    """
+    task_ids = list(task_ids)
+    unread = await db.execute(
+        delete(Notification)
+        .where(Notification.task_id.in_(task_ids), Notification.is_read == False)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        delete(Notification)
+        .where(Notification.task_id.in_(task_ids))
+        .execution_options(synchronize_session=False)
+    )
+    return unread.rowcount
+
+
+async def apply_bulk_write(user_id: UUID, written: list[dict] = (), deleted: Iterable[UUID] = ()):
+    """
+    Invalidate every cached read of a user's tasks once for a committed bulk write,
+    and apply the write to the user's in-memory dependency graph.
+
+    Args:
+        user_id (UUID): ID of the user whose tasks were written.
+        written (list[dict]): Column values of the tasks created or updated.
+        deleted (Iterable[UUID]): IDs of the tasks deleted.
+    """
+    def apply(graph):
+        for row in written:
+            graph.add_task(row["id"], row["status"])
+        for task_id in deleted:
+            graph.remove_task(task_id)
+
+    generation = await bump_generation(user_id)
+    update_dependency_graph(user_id, generation, apply)
+
+
+@router.post("/bulk", dependencies=[Depends(rate_limiter)], response_model=BulkTaskResult, status_code=status.HTTP_201_CREATED)
+async def create_tasks_bulk(
+    tasks: list[CreateTask],
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Create many tasks for the current user in one transaction.
+
+    Items are written with a single multi-row INSERT. The request is rejected
+    with 422 if any item fails schema validation; items with an unknown
+    recurrence interval are reported by their position and skipped.
+    """
+    check_bulk_size(tasks)
+    try:
+        rows, created, errors = [], [], []
+        now = datetime.now()
+        for index, task in enumerate(tasks):
+            try:
+                values = task_values(task)
+            except ValueError:
+                errors.append(BulkTaskError(index=index, detail=f"Invalid recurrence interval '{task.recurrence_interval}'"))
+                continue
+            task_id = uuid.uuid4()
+            rows.append({**values, "id": task_id, "user_id": user.id, "created_at": now, "updated_at": now})
+            created.append(task_id)
+
+        if rows:
+            await db.execute(insert(Task), rows)
+            await db.commit()
+
+            await apply_bulk_write(user.id, written=rows)
+        return {"succeeded": created, "errors": errors}
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+
+@router.patch("/bulk", dependencies=[Depends(rate_limiter)], response_model=BulkTaskResult)
+async def update_tasks_bulk(
+    tasks: list[BulkTaskUpdate],
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Update many tasks of the current user in one transaction.
+
+    Each item replaces the task with its `id`, as `PUT /tasks/{task_id}` does.
+    The request is rejected with 422 if any item fails schema validation; unknown
+    or repeated ids and unknown recurrence intervals are reported by position and skipped.
+    """
+    check_bulk_size(tasks)
+    try:
+        ids = [task.id for task in tasks]
+        current = {
+            row.id: row for row in (await db.execute(
+                select(Task.id, Task.due_date, Task.is_recurring, Task.recurrence_interval)
+                .where(Task.user_id == user.id, Task.id.in_(ids))
+            )).all()
+        }
+
+        rows, updated, errors, seen = [], [], [], set()
+        now = datetime.now()
+        for index, task in enumerate(tasks):
+            if task.id not in current:
+                errors.append(BulkTaskError(index=index, id=task.id, detail="Task not found"))
+                continue
+            if task.id in seen:
+                errors.append(BulkTaskError(index=index, id=task.id, detail="Task appears more than once"))
+                continue
+            try:
+                values = task_values(task)
+            except ValueError:
+                errors.append(BulkTaskError(index=index, id=task.id, detail=f"Invalid recurrence interval '{task.recurrence_interval}'"))
+                continue
+            seen.add(task.id)
+            rows.append({**values, **schedule_resets(current[task.id], values), "updated_at": now})
+            updated.append(task.id)
+
+        if rows:
+            # Bulk UPDATE by primary key: one statement per distinct set of columns
+            await db.execute(update(Task), rows)
+            await db.commit()
+
+            await apply_bulk_write(user.id, written=rows)
+        return {"succeeded": updated, "errors": errors}
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+
+@router.delete("/bulk", dependencies=[Depends(rate_limiter)], response_model=BulkTaskResult)
+async def delete_tasks_bulk(
+    task_ids: list[UUID] = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Delete many tasks of the current user, with their dependency edges and notifications, in one transaction.
+
+    Ids of tasks that do not exist are reported and skipped.
+    """
+    check_bulk_size(task_ids)
+    try:
+        found = set((await db.scalars(
+            select(Task.id).where(Task.user_id == user.id, Task.id.in_(task_ids))
+        )).all())
+        errors = [
+            BulkTaskError(index=index, id=task_id, detail="Task not found")
+            for index, task_id in enumerate(task_ids) if task_id not in found
+        ]
+
+        if found:
+            await db.execute(delete(TaskDependency).where(
+                or_(TaskDependency.task_id.in_(found), TaskDependency.dependent_task_id.in_(found))
+            ))
+            unread = await delete_task_notifications(db, found)
+            await db.execute(delete(Task).where(Task.user_id == user.id, Task.id.in_(found)))
+            await db.commit()
+            if unread:
+                await adjust_unread_count(user.id, -unread)
+
+            await apply_bulk_write(user.id, deleted=found)
+        deleted = list(dict.fromkeys(task_id for task_id in task_ids if task_id in found))
+        return {"succeeded": deleted, "errors": errors}
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
 
 @router.get("/{task_id}",  dependencies= [Depends(rate_limiter)] ,response_model=TaskResponse)
 async def get_task(
     task_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Retrieve a specific task for the current user, with caching.
     """
     try:
-        cache_key = f"task:{user.id}:{task_id}"
-        cached_task = await get_cache(cache_key)
-
-        if cached_task:
-            task_data = json.loads(cached_task)  # Deserialize into a list of dicts
-            return TaskResponse(**task_data) # Convert to TaskResponse models
+        cache_key = await versioned_key("task", user.id, task_id)
 
-        # Fetch task from the database
-        task = db.query(Task).filter(Task.user_id == user.id, Task.id == task_id).first()
-
-        if not task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
-            )
+        async def load_task():
+            task = await db.scalar(select(Task).where(Task.user_id == user.id, Task.id == task_id))
+            if not task:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
+                )
+            return task_payload(task)
 
-        # Serialize the task and set the cache
-        serialized_task = task.to_dict()
-        await set_cache(cache_key, serialized_task)
-        return serialized_task
+        return await get_or_compute_response(cache_key, load_task)
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
@@ -83,20 +413,21 @@ async def get_task(
 @router.post("/",  dependencies= [Depends(rate_limiter)],response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task: CreateTask,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Create a new task for the current user.
     """
     try:
-        new_task = Task(**task.model_dump(), user_id=user.id)
+        new_task = Task(**single_task_values(task), user_id=user.id)
         db.add(new_task)
-        db.commit()
-        db.refresh(new_task)
+        await db.commit()
+        await db.refresh(new_task)
 
-        # Invalidate cache for task list
-        await delete_cache(f"tasks:{user.id}")
+        # Invalidate every cached read of the user's tasks
+        generation = await bump_generation(user.id)
+        update_dependency_graph(user.id, generation, lambda graph: graph.add_task(new_task.id, new_task.status))
         return new_task.to_dict()  # Return serialized task
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
@@ -107,29 +438,31 @@ async def create_task(
 async def update_task(
     task_id: UUID,
     updated_task: CreateTask,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Update an existing task for the current user.
     """
     try:
-        task = db.query(Task).filter(Task.user_id == user.id, Task.id == task_id).first()
+        task = await db.scalar(select(Task).where(Task.user_id == user.id, Task.id == task_id))
 
         if not task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
             )
 
-        for key, value in updated_task.model_dump().items():
+        values = single_task_values(updated_task)
+        values.update(schedule_resets(task, values))  # Remind and reschedule from the new due date
+        for key, value in values.items():
             setattr(task, key, value)
 
-        db.commit()
-        db.refresh(task)
+        await db.commit()
+        await db.refresh(task)
 
-        # Invalidate cache
-        await delete_cache(f"task:{user.id}:{task_id}")
-        await delete_cache(f"tasks:{user.id}")  # Invalidate task list cache
+        # Invalidate every cached read of the user's tasks
+        generation = await bump_generation(user.id)
+        update_dependency_graph(user.id, generation, lambda graph: graph.add_task(task.id, task.status))
         return task
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
@@ -139,26 +472,33 @@ async def update_task(
 @router.delete("/{task_id}", dependencies= [Depends(rate_limiter)], response_model=DetailResponse)
 async def delete_task(
     task_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
-    Delete a task for the current user.
+    Delete a task for the current user, with its dependency edges and notifications.
     """
     try:
-        task = db.query(Task).filter(Task.user_id == user.id, Task.id == task_id).first()
+        task = await db.scalar(select(Task).where(Task.user_id == user.id, Task.id == task_id))
 
         if not task:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Task not found"
             )
 
-        db.delete(task)
-        db.commit()
+        # Drop the task's dependency edges in both directions along with it
+        await db.execute(delete(TaskDependency).where(
+            or_(TaskDependency.task_id == task_id, TaskDependency.dependent_task_id == task_id)
+        ))
+        unread = await delete_task_notifications(db, [task_id])
+        await db.delete(task)
+        await db.commit()
+        if unread:
+            await adjust_unread_count(user.id, -unread)
 
-        # Invalidate cache
-        await delete_cache(f"task:{user.id}:{task_id}")
-        await delete_cache(f"tasks:{user.id}")  # Invalidate task list cache
+        # Invalidate every cached read of the user's tasks
+        generation = await bump_generation(user.id)
+        update_dependency_graph(user.id, generation, lambda graph: graph.remove_task(task_id))
         return {"detail": "Task deleted"}
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
@@ -1,55 +1,178 @@
 # app/routers/task_dependency.py
 
-import json
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from uuid import UUID
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from typing import Optional
+from sqlalchemy import select, func, literal, any_, bindparam, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from fastapi_limiter.depends import RateLimiter
-from app.schemas import DetailResponse, CreateTask, TaskResponse
+from app.schemas import DetailResponse, CreateTask, TaskResponse, TaskPage, TaskDependencyResponse
 from app.models import User, Task, TaskDependency
-from app.utils import logger, get_current_user, set_cache, get_cache, delete_cache
-from app.database import get_db
+from app.utils import (
+    logger,
+    get_current_user,
+    UserSnapshot,
+    get_or_compute_response,
+    task_payload,
+    enable_local_cache,
+    versioned_key,
+    bump_generation,
+    get_dependency_graph,
+    update_dependency_graph,
+    encode_cursor,
+    decode_cursor
+)
+from app.database import get_async_db
 # Create an instance of APIRouter to handle task routes
 router = APIRouter()
 
 # Rate Limiting Middleware
 rate_limiter = RateLimiter(times=1000, minutes=1)
 
+# Serve dependency reads from the in-process cache when possible
+enable_local_cache("dependent-tasks", "task-upstream", "task-downstream", "task-order")
+
+# Guards the recursive queries against cycles inserted before cycle checks existed
+MAX_DEPENDENCY_DEPTH = 1000
+
+
+def dependency_closure(task_id: UUID, upstream: bool):
+    """
+    Build a recursive CTE of (task_id, depth) rows reachable from a task.
+
+    An edge means `TaskDependency.task_id` depends on `TaskDependency.dependent_task_id`.
+    Upstream walks from a task to everything it depends on; downstream walks from a
+    task to everything that depends on it. Rows are deduplicated per depth, so
+    shared sub-graphs are not expanded once per path.
+    """
+    source, target = (
+        (TaskDependency.task_id, TaskDependency.dependent_task_id) if upstream
+        else (TaskDependency.dependent_task_id, TaskDependency.task_id)
+    )
+    closure = (
+        select(target.label("task_id"), literal(1).label("depth"))
+        .where(source == task_id)
+        .cte("closure", recursive=True)
+    )
+    return closure.union(
+        select(target, closure.c.depth + 1)
+        .join(closure, source == closure.c.task_id)
+        .where(closure.c.depth < MAX_DEPENDENCY_DEPTH)
+    )
+
+
+async def depends_on(db: AsyncSession, task_id: UUID, other_task_id: UUID) -> bool:
+    """Check with a single query whether `task_id` depends, directly or not, on `other_task_id`."""
+    closure = dependency_closure(task_id, upstream=True)
+    return await db.scalar(
+        select(func.count()).select_from(closure).where(closure.c.task_id == other_task_id)
+    ) > 0
+
+
+async def load_closure(db: AsyncSession, user_id: UUID, task_id: UUID, upstream: bool) -> list[dict]:
+    """Load every task up- or downstream of a task, nearest first."""
+    task = await db.scalar(select(Task.id).where(Task.id == task_id, Task.user_id == user_id))
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    closure = dependency_closure(task_id, upstream)
+    depth = func.min(closure.c.depth).label("depth")
+    rows = (await db.execute(
+        select(Task, depth)
+        .join(closure, Task.id == closure.c.task_id)
+        .where(Task.user_id == user_id)
+        .group_by(Task.id)
+        .order_by(depth, Task.due_date, Task.id)
+    )).all()
+    return [{**task_payload(task), "depth": depth} for task, depth in rows]
+
+
+# Order all of the user's tasks so that every task follows the tasks it depends on
+@router.get("/order", dependencies=[Depends(rate_limiter)], response_model=list[TaskDependencyResponse])
+async def get_task_order(
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Retrieves all tasks of the current user in topological order.
+
+    `depth` is the length of the longest chain of prerequisites below a task, so
+    tasks with equal depth can be worked on in parallel.
+    """
+    try:
+        cache_key = await versioned_key("task-order", user.id)
+
+        async def load_order():
+            levels = (
+                select(Task.id.label("task_id"), literal(0).label("depth"))
+                .where(Task.user_id == user.id)
+                .cte("levels", recursive=True)
+            )
+            levels = levels.union(
+                select(TaskDependency.task_id, levels.c.depth + 1)
+                .join(levels, TaskDependency.dependent_task_id == levels.c.task_id)
+                .where(levels.c.depth < MAX_DEPENDENCY_DEPTH)
+            )
+            depth = func.max(levels.c.depth).label("depth")
+            rows = (await db.execute(
+                select(Task, depth)
+                .join(levels, Task.id == levels.c.task_id)
+                .group_by(Task.id)
+                .order_by(depth, Task.due_date, Task.id)
+            )).all()
+            return [{**task_payload(task), "depth": depth} for task, depth in rows]
+
+        return await get_or_compute_response(cache_key, load_order)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
 # Add a dependency to a task
 @router.post("/{task_id}/dependencies/{dependent_task_id}", dependencies=[Depends(rate_limiter)], response_model=TaskResponse)
 async def add_dependency_to_task(
     task_id: UUID,
     dependent_task_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Adds a dependent task to the specified task.
     """
     try:
-        task = db.query(Task).filter(Task.id == task_id, Task.user_id == user.id).first()
-        dependent_task = db.query(Task).filter(Task.id == dependent_task_id, Task.user_id == user.id).first()
+        task = await db.scalar(select(Task).where(Task.id == task_id, Task.user_id == user.id))
+        dependent_task = await db.scalar(select(Task).where(Task.id == dependent_task_id, Task.user_id == user.id))
 
         if not task or not dependent_task:
             raise HTTPException(status_code=404, detail="Task(s) not found")
 
         # Check if the dependency already exists
-        existing_dependency = db.query(TaskDependency).filter(
+        existing_dependency = await db.scalar(select(TaskDependency).where(
             TaskDependency.task_id == task_id, TaskDependency.dependent_task_id == dependent_task_id
-        ).first()
+        ))
 
         if existing_dependency:
             raise HTTPException(status_code=400, detail="Dependency already exists")
 
+        # Reject edges that would close a cycle: the prerequisite must not depend on the task
+        if task_id == dependent_task_id or await depends_on(db, dependent_task_id, task_id):
+            raise HTTPException(status_code=400, detail="Dependency would create a cycle")
+
         # Create new dependency
         new_dependency = TaskDependency(task_id=task_id, dependent_task_id=dependent_task_id)
         db.add(new_dependency)
-        db.commit()
+        await db.commit()
+        generation = await bump_generation(user.id)
+        update_dependency_graph(user.id, generation, lambda graph: graph.add_edge(task_id, dependent_task_id))
 
         # Return the updated task with dependencies
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = await db.scalar(select(Task).where(Task.id == task_id))
         return task
+    except IntegrityError:
+        # A concurrent request inserted the same edge first
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Dependency already exists")
     except SQLAlchemyError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
@@ -57,35 +180,153 @@ async def add_dependency_to_task(
 @router.get("/{task_id}/dependencies", dependencies=[Depends(rate_limiter)], response_model=list[TaskResponse])
 async def get_task_dependencies(
     task_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Retrieves a list of tasks that the specified task depends on.
     """
     try:
-        cache_key = f"dependent-tasks:{user.id}"
-        cached_tasks = await get_cache(cache_key)
+        cache_key = await versioned_key("dependent-tasks", user.id, task_id)
 
-        if cached_tasks:
-            # Deserialize the cached JSON string into a list of TaskResponse objects
-            tasks_data = json.loads(cached_tasks)  # Deserialize into a list of dicts
-            return [TaskResponse(**task) for task in tasks_data]  # Convert to TaskResponse models
-        
-        task = db.query(Task).filter(Task.id == task_id, Task.user_id == user.id).first()
+        async def load_dependencies():
+            task = await db.scalar(select(Task).where(Task.id == task_id, Task.user_id == user.id))
 
-        if not task:
-            raise HTTPException(status_code=404, detail="Task not found")
+            if not task:
+                raise HTTPException(status_code=404, detail="Task not found")
+
+            dependencies = (await db.scalars(select(Task).join(
+                TaskDependency, TaskDependency.dependent_task_id == Task.id
+            ).where(TaskDependency.task_id == task_id))).all()
+            return [task_payload(task) for task in dependencies]
+
+        return await get_or_compute_response(cache_key, load_dependencies)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+ID_CHUNK_SIZE = 1000  # Ids per IN list on databases without array parameters
+
+
+def id_conditions(db: AsyncSession, task_ids: list[UUID]) -> list:
+    """
+    Split a filter on `Task.id` over `task_ids` into conditions that each bind a bounded number of parameters.
+
+    PostgreSQL gets a single `= ANY(:ids)` array parameter however many ids there
+    are; other databases get one IN list per `ID_CHUNK_SIZE` ids, to be queried
+    one after the other.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return [Task.id == any_(bindparam("task_ids", task_ids, type_=ARRAY(PG_UUID(as_uuid=True))))]
+    return [
+        Task.id.in_(task_ids[start:start + ID_CHUNK_SIZE])
+        for start in range(0, len(task_ids), ID_CHUNK_SIZE)
+    ]
+
+
+async def load_tasks_in_order(db: AsyncSession, user_id: UUID, task_ids: list[UUID]) -> list[Task]:
+    """Load tasks by id, in the order of `task_ids`."""
+    by_id = {}
+    for condition in id_conditions(db, task_ids):
+        tasks = await db.scalars(select(Task).where(Task.user_id == user_id, condition))
+        by_id.update((task.id, task) for task in tasks)
+    return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
+
+# Get the tasks that can be worked on now
+@router.get("/ready", dependencies=[Depends(rate_limiter)], response_model=TaskPage)
+async def get_ready_tasks(
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of tasks to return."),
+    cursor: Optional[str] = Query(None, description="Cursor returned as `next_cursor` by the previous page."),
+):
+    """
+    Retrieves a page of the incomplete tasks of the current user whose prerequisites are all complete.
+
+    Tasks are ordered by due date, and pages are keyed on `(due_date, id)`: pass the
+    `next_cursor` of a page as `cursor` to fetch the following one.
+    """
+    try:
+        graph = await get_dependency_graph(db, user.id)
+        query = select(Task).where(Task.user_id == user.id)
+        if cursor:
+            last_due_date, last_id = decode_cursor(cursor)
+            query = query.where(tuple_(Task.due_date, Task.id) > tuple_(last_due_date, last_id))
+        query = query.order_by(Task.due_date, Task.id).limit(limit + 1)
 
-        dependencies = db.query(Task).join(
-            TaskDependency, TaskDependency.dependent_task_id == Task.id
-        ).filter(TaskDependency.task_id == task_id).all()
+        # Each condition yields its own first page; the page is the first of their union
+        tasks = []
+        for condition in id_conditions(db, graph.ready()):
+            tasks.extend((await db.scalars(query.where(condition))).all())
+        tasks = sorted(tasks, key=lambda task: (task.due_date, task.id))[:limit + 1]
 
-        serialized_tasks = [task.to_dict() for task in dependencies]
-        await set_cache(cache_key, serialized_tasks)  # Ensure you serialize to JSON format
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1].due_date, tasks[-1].id)
+        return {"items": tasks, "next_cursor": next_cursor}
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
-        return dependencies
+# Get the longest chain of incomplete tasks
+@router.get("/critical-path", dependencies=[Depends(rate_limiter)], response_model=list[TaskResponse])
+async def get_critical_path(
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Retrieves the longest chain of incomplete tasks of the current user, first task first.
+
+    Every task counts as one step, so this is the chain that takes the most tasks to finish.
+    """
+    try:
+        graph = await get_dependency_graph(db, user.id)
+        return await load_tasks_in_order(db, user.id, graph.critical_path())
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+# Get everything a task depends on, directly or not
+@router.get("/{task_id}/dependencies/upstream", dependencies=[Depends(rate_limiter)], response_model=list[TaskDependencyResponse])
+async def get_upstream_tasks(
+    task_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Retrieves every task the specified task depends on, transitively, nearest first.
+
+    `depth` is the number of dependency hops from the specified task.
+    """
+    try:
+        cache_key = await versioned_key("task-upstream", user.id, task_id)
+        return await get_or_compute_response(
+            cache_key, lambda: load_closure(db, user.id, task_id, upstream=True)
+        )
+    except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+# Get everything that depends on a task, directly or not
+@router.get("/{task_id}/dependencies/downstream", dependencies=[Depends(rate_limiter)], response_model=list[TaskDependencyResponse])
+async def get_downstream_tasks(
+    task_id: UUID,
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
+):
+    """
+    Retrieves every task that depends on the specified task, transitively, nearest first.
+
+    `depth` is the number of dependency hops from the specified task.
+    """
+    try:
+        cache_key = await versioned_key("task-downstream", user.id, task_id)
+        return await get_or_compute_response(
+            cache_key, lambda: load_closure(db, user.id, task_id, upstream=False)
+        )
     except SQLAlchemyError as e:
+        logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 # Remove a dependency from a task
@@ -93,30 +334,32 @@ async def get_task_dependencies(
 async def remove_dependency_from_task(
     task_id: UUID,
     dependent_task_id: UUID,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    user: UserSnapshot = Depends(get_current_user),
 ):
     """
     Removes a specific dependency for a task.
     """
     try:
-        task = db.query(Task).filter(Task.id == task_id, Task.user_id == user.id).first()
+        task = await db.scalar(select(Task).where(Task.id == task_id, Task.user_id == user.id))
 
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
-        dependency = db.query(TaskDependency).filter(
+        dependency = await db.scalar(select(TaskDependency).where(
             TaskDependency.task_id == task_id, TaskDependency.dependent_task_id == dependent_task_id
-        ).first()
+        ))
 
         if not dependency:
             raise HTTPException(status_code=404, detail="Dependency not found")
 
-        db.delete(dependency)
-        db.commit()
+        await db.delete(dependency)
+        await db.commit()
+        generation = await bump_generation(user.id)
+        update_dependency_graph(user.id, generation, lambda graph: graph.remove_edge(task_id, dependent_task_id))
 
         # Return the updated task after removal of the dependency
-        task = db.query(Task).filter(Task.id == task_id).first()
+        task = await db.scalar(select(Task).where(Task.id == task_id))
         return task
     except SQLAlchemyError as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
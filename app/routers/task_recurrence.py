@@ -1,48 +1,50 @@
 # app/routers/task_recurrence.py
 
-import json
 from fastapi_limiter.depends import RateLimiter
 from fastapi import APIRouter, Depends, HTTPException, status
 from uuid import UUID
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi_limiter.depends import RateLimiter
 from app.models import User, Task
 from app.utils import (
     logger, 
     get_current_user, 
-    set_cache, 
-    get_cache, 
-    delete_cache
+    UserSnapshot,
+    get_or_compute_response,
+    task_payload,
+    enable_local_cache,
+    versioned_key,
+    bump_generation
 )
 from app.schemas import TaskResponse, TaskRecurrenceChange
-from app.database import get_db
+from app.database import get_async_db
 
 rate_limiter = RateLimiter(times=1000, minutes=1)
 # Create an instance of APIRouter to handle task routes
 router = APIRouter()
 
+# Serve recurring task reads from the in-process cache when possible
+enable_local_cache("recurring-tasks", "recurring-task")
 
-@router.get("/", dependencies=[Depends(rate_limiter)])
+
+@router.get("/", dependencies=[Depends(rate_limiter)], response_model=list[TaskResponse])
 async def get_all_recurring_tasks(
-    db: Session = Depends(get_db), 
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db), 
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     """Retrieve a list of all recurring tasks."""
     try:
-        cache_key = f"recurring-tasks:{current_user.id}"
-        cached_tasks = await get_cache(cache_key)
+        cache_key = await versioned_key("recurring-tasks", current_user.id)
+
+        async def load_recurring_tasks():
+            recurring_tasks = (await db.scalars(select(Task).where(Task.is_recurring == True, Task.user_id == current_user.id))).all()
+            if not recurring_tasks:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No recurring tasks found")
+            return [task_payload(task) for task in recurring_tasks]
 
-        if cached_tasks:
-            # Deserialize the cached JSON string into a list of TaskResponse objects
-            tasks_data = json.loads(cached_tasks)  # Deserialize into a list of dicts
-            return [TaskResponse(**task) for task in tasks_data]  # Convert to TaskResponse models
-        recurring_tasks = db.query(Task).filter(Task.is_recurring == True, Task.user_id == current_user.id).all()
-        if not recurring_tasks:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No recurring tasks found")
-        serialized_tasks = [task.to_dict() for task in recurring_tasks]
-        await set_cache(cache_key, serialized_tasks)  # Ensure you serialize to JSON format
-        return recurring_tasks
+        return await get_or_compute_response(cache_key, load_recurring_tasks)
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
@@ -51,50 +53,45 @@ async def get_all_recurring_tasks(
 async def update_recurrence(
     task_id: UUID, 
     recurrence_data: TaskRecurrenceChange, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     """Update the recurrence interval or other settings for a recurring task."""
     try:
-        task = db.query(Task).filter(Task.id == task_id, Task.is_recurring == True, Task.user_id == current_user.id).first()
+        task = await db.scalar(select(Task).where(Task.id == task_id, Task.is_recurring == True, Task.user_id == current_user.id))
         
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
         
-        # Update the recurrence settings
+        # Update the recurrence settings, and let the recurring task job schedule the new interval
+        if task.recurrence_interval != recurrence_data.recurrence_interval:
+            task.next_occurrence_at = None
         task.recurrence_interval = recurrence_data.recurrence_interval
-        db.commit()
-        db.refresh(task)
+        await db.commit()
+        await db.refresh(task)
         
-        await delete_cache(f"recurring-tasks:{current_user.id}:{task_id}")
-        await delete_cache(f"recurring-tasks:{current_user.id}")  # Invalidate task list cache
+        await bump_generation(current_user.id)  # Invalidate every cached read of the user's tasks
 
         return {"message": "Recurrence settings updated", "task": task}
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
-@router.get("/{task_id}/recurrence", dependencies=[Depends(rate_limiter)])
+@router.get("/{task_id}/recurrence", dependencies=[Depends(rate_limiter)], response_model=TaskResponse)
 async def get_task_recurrence(
-    task_id: UUID, db: Session = Depends(get_db),current_user: User = Depends(get_current_user)
+    task_id: UUID, db: AsyncSession = Depends(get_async_db),current_user: UserSnapshot = Depends(get_current_user)
 ):
     """Update the recurrence interval or other settings for a recurring task."""
     try:
-        cache_key = f"task:{current_user.id}:{task_id}"
-        cached_task = await get_cache(cache_key)
+        cache_key = await versioned_key("recurring-task", current_user.id, task_id)
 
-        if cached_task:
-            task_data = json.loads(cached_task)  # Deserialize into a list of dicts
-            return TaskResponse(**task_data) # Convert to TaskResponse models
-        
-        task = db.query(Task).filter(Task.id == task_id, Task.is_recurring == True, Task.user_id == current_user.id).first()        
-        if not task:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-        
-        # Serialize the task and set the cache
-        serialized_task = task.to_dict()
-        await set_cache(cache_key, serialized_task)
-        return task
+        async def load_task():
+            task = await db.scalar(select(Task).where(Task.id == task_id, Task.is_recurring == True, Task.user_id == current_user.id))
+            if not task:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+            return task_payload(task)
+
+        return await get_or_compute_response(cache_key, load_task)
     except SQLAlchemyError as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
@@ -7,12 +7,23 @@ from .auth import (
     APIKeyResponse
 )
 from .task import (
+    NaiveDateTime,
     CreateTask,
-    TaskResponse
+    TaskResponse,
+    TaskPage,
+    BulkTaskUpdate,
+    BulkTaskError,
+    BulkTaskResult
 )
 from .notifications import (
-    NotificationResponse
+    NotificationResponse,
+    NotificationPage,
+    UnreadCountResponse,
+    MarkReadResult
 )
 from .task_recurrence import (
     TaskRecurrenceChange
+)
+from .task_dependency import (
+    TaskDependencyResponse
 )
\ No newline at end of file
@@ -16,3 +16,14 @@ class NotificationResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class NotificationPage(BaseModel):
+    items: list[NotificationResponse]
+    next_cursor: Optional[str] = None
+
+class UnreadCountResponse(BaseModel):
+    unread: int
+
+class MarkReadResult(BaseModel):
+    updated: int  # Notifications that were unread and are now read
+    items: list[NotificationResponse] = []
@@ -1,13 +1,26 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, AfterValidator
+from datetime import datetime, timezone
 from uuid import UUID
 from app.models import TaskPriority, TaskStatus
-from typing import Optional
+from typing import Annotated, Optional
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Convert a timezone-aware datetime to naive UTC, as stored in the DateTime columns; naive values are kept as given."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Incoming datetime that may carry an offset (e.g. "2030-01-01T00:00:00Z").
+# asyncpg refuses aware values for TIMESTAMP WITHOUT TIME ZONE columns.
+NaiveDateTime = Annotated[datetime, AfterValidator(to_naive_utc)]
+
 
 class CreateTask(BaseModel):
     title: str
     description: str
-    due_date: datetime
+    due_date: NaiveDateTime
     status: TaskStatus
     priority: TaskPriority
     is_recurring: bool = False
@@ -26,4 +39,21 @@ class TaskResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TaskPage(BaseModel):
+    items: list[TaskResponse]
+    next_cursor: Optional[str] = None
+
+
+class BulkTaskUpdate(CreateTask):
+    id: UUID
+
+class BulkTaskError(BaseModel):
+    index: int  # Position of the item in the request
+    id: Optional[UUID] = None
+    detail: str
+
+class BulkTaskResult(BaseModel):
+    succeeded: list[UUID]  # IDs of the tasks created, updated or deleted
+    errors: list[BulkTaskError]
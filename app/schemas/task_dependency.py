@@ -0,0 +1,6 @@
+# app/schemas/task_dependency.py
+
+from app.schemas.task import TaskResponse
+
+class TaskDependencyResponse(TaskResponse):
+    depth: int  # Dependency hops from the requested task, or level in a topological order
@@ -1,16 +1,60 @@
 from .security import (
     verify_password, 
     hash_password,
+    hash_password_async,
+    verify_and_update_password,
+    get_password_hash_stats,
     create_api_key,
     verify_api_key
 )  # Security functions
 from .logging_config import logger
-from .auth import get_current_user
+from .auth import (
+    get_current_user,
+    get_current_stream_user,
+    UserSnapshot,
+    invalidate_user_cache,
+    get_auth_cache_stats
+)
 from .redis_cache import (
+    redis_client,
+    sync_redis_client,
     set_cache,
     get_cache,
-    delete_cache
+    delete_cache,
+    get_or_compute,
+    get_or_compute_response,
+    enable_local_cache,
+    listen_for_invalidations,
+    get_local_cache_stats,
+    get_generation,
+    versioned_key,
+    bump_generation,
+    bump_generations_sync
+)
+from .pagination import (
+    encode_cursor,
+    decode_cursor
+)
+from .serializers import (
+    TASK_RESPONSE_FIELDS,
+    task_payload
+)
+from .dependency_graph import (
+    DependencyGraph,
+    get_dependency_graph,
+    update_dependency_graph,
+    get_dependency_graph_stats
+)
+from .notification_stream import (
+    notification_channel,
+    notification_hub,
+    get_notification_stream_stats
 )
 from .notification import  (
-    send_notification
+    send_notification,
+    send_notifications_bulk,
+    publish_notifications_sync,
+    get_unread_count,
+    adjust_unread_count,
+    adjust_unread_counts_sync
 )
\ No newline at end of file
@@ -1,8 +1,14 @@
 # app/utils/helpers/auth.py
 
+import hashlib
+import json
+import time
+from dataclasses import dataclass, asdict
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import (
     User
 )
@@ -10,7 +16,10 @@ from app.utils import (
     logger,
     verify_api_key
 )
-from app.database import get_db
+from app.database import get_async_db, AsyncSessionLocal
+from app.config import settings
+from .redis_cache import redis_client
+from .ttl_cache import TTLCache
 
 
 # OAuth2 scheme to retrieve token from Authorization header
@@ -18,25 +27,114 @@ from app.database import get_db
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@dataclass(frozen=True)
+class UserSnapshot:
+    """
+    Identity of the authenticated user as returned by `get_current_user`.
+
+    Routes that need to modify the user row load it by `id` in their own session.
+
+    Attributes:
+        id (UUID): Unique identifier of the user.
+        username (str): Username of the user.
+        email (str): Email of the user.
+    """
+    id: UUID
+    username: str
+    email: str
+
+
+# Per-process cache of token -> UserSnapshot, keyed by the token's SHA-256 digest
+auth_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+auth_cache_redis_hits = 0
+
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def _get_shared_snapshot(digest: str) -> UserSnapshot | None:
+    """Look up a snapshot cached by another worker in Redis."""
+    global auth_cache_redis_hits
+    try:
+        cached = await redis_client.get(f"auth:{digest}")
+    except Exception as e:
+        logger.error(f"Error reading auth cache from Redis: {e}")
+        return None
+    if not cached:
+        return None
+    data = json.loads(cached)
+    auth_cache_redis_hits += 1
+    return UserSnapshot(id=UUID(data["id"]), username=data["username"], email=data["email"])
+
+
+async def _set_shared_snapshot(digest: str, snapshot: UserSnapshot, ttl: int):
+    """Share a snapshot with other workers and index it by user for invalidation."""
+    data = asdict(snapshot)
+    data["id"] = str(snapshot.id)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.set(f"auth:{digest}", json.dumps(data), ex=ttl)
+            pipe.sadd(f"auth-tokens:{snapshot.id}", digest)
+            pipe.expire(f"auth-tokens:{snapshot.id}", settings.AUTH_CACHE_TTL)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error writing auth cache to Redis: {e}")
+
+
+async def invalidate_user_cache(user_id: UUID):
+    """
+    Drop every cached token lookup for a user.
+
+    Call this whenever the user's credentials change or the account is deleted.
+    Other workers' in-process entries expire within `AUTH_CACHE_TTL` seconds.
+
+    Args:
+        user_id (UUID): ID of the user whose cached lookups should be dropped.
+    """
+    auth_cache.discard_where(lambda snapshot: snapshot.id == user_id)
+    if settings.AUTH_CACHE_REDIS:
+        index_key = f"auth-tokens:{user_id}"
+        digests = await redis_client.smembers(index_key)
+        await redis_client.delete(index_key, *(f"auth:{digest}" for digest in digests))
+
+
+def get_auth_cache_stats() -> dict:
+    """Report hit/miss counters of the authentication cache."""
+    return {**auth_cache.stats(), "redis_hits": auth_cache_redis_hits}
+
+
 # Dependency to retrieve and verify the current user
 # This will be used to secure routes that require user authentication
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-):
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
     """
     Retrieves the current authenticated user by verifying the provided token.
 
+    Verified tokens are cached for `AUTH_CACHE_TTL` seconds (never past the token's
+    expiry), so most requests skip both JWT decoding and the user query.
+
     Args: \n
         token (str): The authentication token passed in the Authorization header.
-        db (Session): The database session to query user information.
+        db (AsyncSession): The database session to query user information.
 
     Raises:
         HTTPException: If token validation fails or the user cannot be found.
 
     Returns:
-        User: The authenticated user object from the database.
+        UserSnapshot: The authenticated user's identity.
     """
     try:
+        digest = _token_digest(token)
+        snapshot = auth_cache.get(digest)
+        if snapshot is None and settings.AUTH_CACHE_REDIS:
+            snapshot = await _get_shared_snapshot(digest)
+            if snapshot is not None:
+                auth_cache.set(digest, snapshot)
+        if snapshot is not None:
+            return snapshot
+
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -55,13 +153,38 @@ async def get_current_user(
             raise credentials_exception
 
         # Query the user by username from the database
-        db_user = db.query(User).filter(User.username == username).first()
+        db_user = await db.scalar(select(User).where(User.username == username))
         if db_user is None:
             logger.warning(f"Unauthorized access attempt by unknown user '{username}'.")
             raise credentials_exception
 
+        # Cache the lookup, but never beyond the token's own expiry
+        snapshot = UserSnapshot(id=db_user.id, username=db_user.username, email=db_user.email)
+        ttl = int(min(settings.AUTH_CACHE_TTL, payload.get("exp", time.time()) - time.time()))
+        if ttl > 0:
+            auth_cache.set(digest, snapshot, ttl=ttl)
+            if settings.AUTH_CACHE_REDIS:
+                await _set_shared_snapshot(digest, snapshot, ttl)
+
         logger.info(f"User '{username}' authenticated successfully.")
-        return db_user
+        return snapshot
     except Exception as e:
         logger.error(f"Error during user authentication: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+async def get_current_stream_user(token: str = Depends(oauth2_scheme)) -> UserSnapshot:
+    """
+    Same as `get_current_user`, for long-lived streaming responses.
+
+    The session used for the lookup is closed before the route runs, so an open
+    stream never holds a database connection.
+
+    Args: \n
+        token (str): The authentication token passed in the Authorization header.
+
+    Returns:
+        UserSnapshot: The authenticated user's identity.
+    """
+    async with AsyncSessionLocal() as db:
+        return await get_current_user(token, db)
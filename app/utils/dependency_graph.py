@@ -0,0 +1,197 @@
+# app/utils/dependency_graph.py
+
+from array import array
+from typing import Callable
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Task, TaskDependency, TaskStatus
+from app.config import settings
+from .redis_cache import get_generation
+from .ttl_cache import TTLCache
+
+
+class DependencyGraph:
+    """
+    Adjacency lists of one user's tasks, with task ids mapped to integer nodes.
+
+    An edge means a task depends on (cannot start before) another task, as in
+    `TaskDependency`. Nodes of deleted tasks are left as holes rather than
+    renumbering the graph.
+
+    Attributes:
+        generation (int): Cache generation of the user the graph reflects.
+        ids (list[UUID | None]): Task id of each node, None once deleted.
+        nodes (dict[UUID, int]): Node of each task id.
+        prerequisites (list[array]): Nodes each node depends on.
+        dependents (list[array]): Nodes depending on each node.
+        complete (bytearray): 1 for nodes whose task is COMPLETE.
+    """
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.ids: list[UUID | None] = []
+        self.nodes: dict[UUID, int] = {}
+        self.prerequisites: list[array] = []
+        self.dependents: list[array] = []
+        self.complete = bytearray()
+
+    def add_task(self, task_id: UUID, status: TaskStatus) -> int:
+        """Add a task, or update its status if already present, and return its node."""
+        node = self.nodes.get(task_id)
+        if node is None:
+            node = len(self.ids)
+            self.nodes[task_id] = node
+            self.ids.append(task_id)
+            self.prerequisites.append(array("i"))
+            self.dependents.append(array("i"))
+            self.complete.append(0)
+        self.complete[node] = status == TaskStatus.COMPLETE
+        return node
+
+    def remove_task(self, task_id: UUID):
+        """Remove a task and every edge touching it."""
+        node = self.nodes.pop(task_id, None)
+        if node is None:
+            return
+        for other in self.prerequisites[node]:
+            self.dependents[other].remove(node)
+        for other in self.dependents[node]:
+            self.prerequisites[other].remove(node)
+        self.ids[node] = None
+        self.prerequisites[node] = array("i")
+        self.dependents[node] = array("i")
+
+    def add_edge(self, task_id: UUID, prerequisite_id: UUID):
+        """Record that `task_id` depends on `prerequisite_id`."""
+        node, other = self.nodes.get(task_id), self.nodes.get(prerequisite_id)
+        if node is None or other is None or other in self.prerequisites[node]:
+            return
+        self.prerequisites[node].append(other)
+        self.dependents[other].append(node)
+
+    def remove_edge(self, task_id: UUID, prerequisite_id: UUID):
+        """Forget that `task_id` depends on `prerequisite_id`."""
+        node, other = self.nodes.get(task_id), self.nodes.get(prerequisite_id)
+        if node is None or other is None or other not in self.prerequisites[node]:
+            return
+        self.prerequisites[node].remove(other)
+        self.dependents[other].remove(node)
+
+    def ready(self) -> list[UUID]:
+        """Return the incomplete tasks whose prerequisites are all COMPLETE."""
+        return [
+            task_id for node, task_id in enumerate(self.ids)
+            if task_id is not None
+            and not self.complete[node]
+            and all(self.complete[other] for other in self.prerequisites[node])
+        ]
+
+    def critical_path(self) -> list[UUID]:
+        """
+        Return the longest chain of incomplete tasks, first to last.
+
+        Tasks carry no duration, so every task counts as one step. Completed tasks
+        are ignored as they no longer hold anything up.
+        """
+        pending = [node for node, task_id in enumerate(self.ids) if task_id is not None and not self.complete[node]]
+        remaining = {
+            node: sum(1 for other in self.prerequisites[node] if not self.complete[other])
+            for node in pending
+        }
+        length = dict.fromkeys(pending, 1)
+        previous: dict[int, int] = {}
+
+        # Kahn's algorithm: relax each node once all of its pending prerequisites are done
+        queue = [node for node in pending if remaining[node] == 0]
+        for node in queue:
+            for other in self.dependents[node]:
+                if other not in remaining:
+                    continue
+                if length[node] + 1 > length[other]:
+                    length[other] = length[node] + 1
+                    previous[other] = node
+                remaining[other] -= 1
+                if remaining[other] == 0:
+                    queue.append(other)
+
+        if not length:
+            return []
+        node = max(length, key=length.get)
+        path = [node]
+        while node in previous:
+            node = previous[node]
+            path.append(node)
+        return [self.ids[node] for node in reversed(path)]
+
+
+# Per-process graphs, keyed by user id
+graph_cache = TTLCache(maxsize=settings.DEPENDENCY_GRAPH_CACHE_SIZE, ttl=settings.DEPENDENCY_GRAPH_CACHE_TTL)
+
+
+async def build_dependency_graph(db: AsyncSession, user_id: UUID, generation: int) -> DependencyGraph:
+    """Load a user's tasks and dependency edges into a new graph."""
+    graph = DependencyGraph(generation)
+    for task_id, status in (await db.execute(select(Task.id, Task.status).where(Task.user_id == user_id))).all():
+        graph.add_task(task_id, status)
+    edges = await db.execute(
+        select(TaskDependency.task_id, TaskDependency.dependent_task_id)
+        .join(Task, Task.id == TaskDependency.task_id)
+        .where(Task.user_id == user_id)
+    )
+    for task_id, prerequisite_id in edges.all():
+        graph.add_edge(task_id, prerequisite_id)
+    return graph
+
+
+async def get_dependency_graph(db: AsyncSession, user_id: UUID) -> DependencyGraph:
+    """
+    Return the dependency graph of a user, building it on first use.
+
+    A cached graph is only used while it matches the user's current cache
+    generation, so writes this process did not apply (another worker, a Celery
+    job) trigger a rebuild.
+
+    Args:
+        db (AsyncSession): The database session used to build the graph.
+        user_id (UUID): ID of the user.
+
+    Returns:
+        DependencyGraph: The user's graph.
+    """
+    generation = await get_generation(user_id)
+    graph = graph_cache.get(user_id)
+    if graph is None or graph.generation != generation:
+        graph = await build_dependency_graph(db, user_id, generation)
+        graph_cache.set(user_id, graph)
+    return graph
+
+
+def update_dependency_graph(user_id: UUID, generation: int | None, apply: Callable[[DependencyGraph], None]):
+    """
+    Apply a committed write to the cached graph of a user, if there is one.
+
+    Call this with the generation returned by `bump_generation` for the write.
+    The graph is patched only if it was current right before that bump; otherwise
+    it is dropped and rebuilt on next use. Graph updates are idempotent, so
+    applying a write a rebuild already picked up is harmless.
+
+    Args:
+        user_id (UUID): ID of the user whose data changed.
+        generation (int | None): The user's generation after the write, or None if
+            the bump failed, in which case the graph is dropped.
+        apply (Callable[[DependencyGraph], None]): Applies the write to the graph.
+    """
+    graph = graph_cache.get(user_id)
+    if graph is None:
+        return
+    if generation is not None and graph.generation in (generation - 1, generation):
+        apply(graph)
+        graph.generation = generation
+    else:
+        graph_cache.pop(user_id)
+
+
+def get_dependency_graph_stats() -> dict:
+    """Report hit/miss counters of the dependency graph cache."""
+    return graph_cache.stats()
@@ -1,16 +1,215 @@
+import time
+from collections import Counter
+from itertools import islice
+from typing import Callable, Iterable
+import orjson
+import redis
+from sqlalchemy import insert, select, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models import (
     Notification
 )
+from app.config import settings
 from datetime import datetime
-from uuid import UUID
+from uuid import UUID, uuid4
+from .logging_config import logger
+from .redis_cache import redis_client, sync_redis_client
+from .notification_stream import notification_channel
 
-def send_notification(db: Session, user_id: UUID, message: str, task_id:UUID):
-    notification = Notification(
-        user_id=user_id,
-        message=message,
-        sent_at = datetime.now(),
-        task_id = task_id
+
+# Unread counters.
+# "unread:<user_id>" holds the number of unread notifications of a user. It is
+# created from a COUNT query on first read and then adjusted by every write path.
+# Adjustments skip missing counters, so a counter is never started from a wrong
+# base; UNREAD_COUNT_TTL bounds how long any drift can last.
+ADJUST_UNREAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    local count = redis.call('INCRBY', KEYS[1], ARGV[1])
+    if count < 0 then
+        redis.call('SET', KEYS[1], 0, 'KEEPTTL')
+    end
+end
+"""
+adjust_unread = redis_client.register_script(ADJUST_UNREAD_SCRIPT)
+adjust_unread_sync = sync_redis_client.register_script(ADJUST_UNREAD_SCRIPT)
+
+
+def _unread_key(user_id: UUID) -> str:
+    return f"unread:{user_id}"
+
+
+async def get_unread_count(db: AsyncSession, user_id: UUID) -> int:
+    """
+    Return the number of unread notifications of a user, counting them only if no counter exists.
+
+    Args:
+        db (AsyncSession): The database session used when the counter must be rebuilt.
+        user_id (UUID): ID of the user.
+
+    Returns:
+        int: Unread notifications.
+    """
+    try:
+        count = await redis_client.get(_unread_key(user_id))
+        if count is not None:
+            return int(count)
+    except redis.RedisError as e:
+        logger.error(f"Error reading unread count for user {user_id}: {e}")
+        return await _count_unread(db, user_id)
+
+    count = await _count_unread(db, user_id)
+    try:
+        await redis_client.set(_unread_key(user_id), count, ex=settings.UNREAD_COUNT_TTL, nx=True)
+    except redis.RedisError as e:
+        logger.error(f"Error storing unread count for user {user_id}: {e}")
+    return count
+
+
+async def _count_unread(db: AsyncSession, user_id: UUID) -> int:
+    return await db.scalar(
+        select(func.count()).select_from(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)
     )
-    db.add(notification)
-    db.commit()
\ No newline at end of file
+
+
+async def adjust_unread_count(user_id: UUID, delta: int):
+    """Add `delta` to a user's unread counter, if it exists. Call after the change is committed."""
+    try:
+        await adjust_unread(keys=[_unread_key(user_id)], args=[delta])
+    except redis.RedisError as e:
+        logger.error(f"Error adjusting unread count for user {user_id}: {e}")
+
+
+def adjust_unread_counts_sync(deltas: dict[UUID, int]):
+    """Add to the unread counters of several users from synchronous code (Celery jobs)."""
+    try:
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for user_id, delta in deltas.items():
+                adjust_unread_sync(keys=[_unread_key(user_id)], args=[delta], client=pipe)
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Error adjusting unread counts: {e}")
+
+
+def publish_notifications_sync(rows: list[dict]):
+    """
+    Publish committed notifications on their users' channels for open notification streams.
+
+    Each message is the notification as returned by the notification endpoints.
+    Delivery is best effort: notifications published while no stream is open,
+    or while Redis is unreachable, are only found through the notification list.
+    """
+    try:
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for row in rows:
+                event = {
+                    "id": row["id"],
+                    "message": row["message"],
+                    "is_read": False,
+                    "task_id": row["task_id"],
+                    "created_at": row["created_at"],
+                    "sent_at": row["sent_at"],
+                }
+                pipe.publish(notification_channel(row["user_id"]), orjson.dumps(event))
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Error publishing notifications: {e}")
+
+
+def _notification_row(user_id: UUID, message: str, task_id: UUID, sent_at: datetime) -> dict:
+    # Ids and timestamps are set here rather than by column defaults so they can be published
+    return {
+        "id": uuid4(),
+        "user_id": user_id,
+        "message": message,
+        "task_id": task_id,
+        "created_at": sent_at,
+        "sent_at": sent_at,
+    }
+
+
+def _after_commit(rows: list[dict]):
+    adjust_unread_counts_sync(Counter(row["user_id"] for row in rows))
+    publish_notifications_sync(rows)
+
+
+def send_notification(db: Session, user_id: UUID, message: str, task_id:UUID):
+    row = _notification_row(user_id, message, task_id, datetime.now())
+    db.add(Notification(**row))
+    db.commit()
+    _after_commit([row])
+
+
+def _insert_rows_individually(
+    db: Session, rows: list[dict], on_chunk: Callable[[Session, list[dict]], None] | None
+) -> int:
+    """Insert a failed chunk row by row in savepoints and return how many rows still failed."""
+    written = []
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(Notification), [row])
+            written.append(row)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to send notification for task {row['task_id']}: {e}")
+    if on_chunk is not None and written:
+        on_chunk(db, written)
+    db.commit()
+    _after_commit(written)
+    return len(rows) - len(written)
+
+
+def send_notifications_bulk(
+    db: Session,
+    notifications: Iterable[dict],
+    chunk_size: int = 500,
+    on_chunk: Callable[[Session, list[dict]], None] | None = None,
+) -> dict:
+    """
+    Write many notifications with one multi-row INSERT and one commit per chunk.
+
+    If a chunk fails, it is retried row by row so that one bad row (e.g. a task
+    deleted in the meantime) only loses its own notification. Each committed
+    chunk is published to open notification streams.
+
+    Args:
+        db (Session): The database session to write with.
+        notifications (Iterable[dict]): Items with `user_id`, `message` and `task_id`.
+        chunk_size (int): Notifications written per INSERT and commit.
+        on_chunk (Callable[[Session, list[dict]], None] | None): Called with the rows written
+            for each chunk before it is committed, to record bookkeeping in the same transaction.
+
+    Returns:
+        dict: Notifications sent and failed, per-chunk counts, elapsed seconds and rows per second.
+    """
+    start = time.perf_counter()
+    sent_at = datetime.now()
+    notifications = iter(notifications)
+    chunks = []
+
+    while chunk := list(islice(notifications, chunk_size)):
+        rows = [_notification_row(n["user_id"], n["message"], n["task_id"], sent_at) for n in chunk]
+        try:
+            db.execute(insert(Notification), rows)
+            if on_chunk is not None:
+                on_chunk(db, rows)
+            db.commit()
+            _after_commit(rows)
+            failed = 0
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Bulk notification insert of {len(rows)} rows failed, retrying individually: {e}")
+            failed = _insert_rows_individually(db, rows, on_chunk)
+        chunks.append({"size": len(rows), "failed": failed})
+
+    elapsed = time.perf_counter() - start
+    sent = sum(chunk["size"] - chunk["failed"] for chunk in chunks)
+    return {
+        "sent": sent,
+        "failed": sum(chunk["failed"] for chunk in chunks),
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(sent / elapsed, 1) if elapsed > 0 else 0.0,
+    }
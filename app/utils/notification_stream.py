@@ -0,0 +1,128 @@
+# app/utils/notification_stream.py
+
+import asyncio
+from uuid import UUID
+import redis
+from app.config import settings
+from .logging_config import logger
+from .redis_cache import redis_client
+
+
+def notification_channel(user_id: UUID) -> str:
+    """Redis pub/sub channel new notifications of a user are published on."""
+    return f"notifications:{user_id}"
+
+
+class NotificationHub:
+    """
+    Fans notifications published on per-user Redis channels out to the streams open in this process.
+
+    A single pub/sub connection per process carries every channel, and a user's
+    channel is subscribed only while one of their streams is open here. Each
+    stream reads from its own bounded queue; a client too slow to drain it loses
+    its oldest events instead of growing the queue.
+
+    Attributes:
+        streams (dict[str, set[asyncio.Queue]]): Queues of the open streams, by channel.
+        delivered (int): Events put on stream queues.
+        dropped (int): Events discarded from full queues.
+    """
+
+    def __init__(self):
+        self.streams: dict[str, set[asyncio.Queue]] = {}
+        self.delivered = 0
+        self.dropped = 0
+        self._pubsub = None
+        self._reader: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, user_id: UUID) -> asyncio.Queue:
+        """
+        Open a stream of a user's notifications.
+
+        Args:
+            user_id (UUID): ID of the user.
+
+        Returns:
+            asyncio.Queue: Receives the JSON of each new notification. Pass it to
+            `unsubscribe` when the stream ends.
+
+        Raises:
+            redis.RedisError: If the channel cannot be subscribed.
+        """
+        channel = notification_channel(user_id)
+        queue = asyncio.Queue(maxsize=settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+        async with self._lock:
+            if self._pubsub is None:
+                self._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            if channel not in self.streams:
+                await self._pubsub.subscribe(channel)
+                self.streams[channel] = set()
+            self.streams[channel].add(queue)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        return queue
+
+    async def unsubscribe(self, user_id: UUID, queue: asyncio.Queue):
+        """Close a stream opened by `subscribe`, dropping the channel once no stream uses it."""
+        channel = notification_channel(user_id)
+        async with self._lock:
+            queues = self.streams.get(channel)
+            if queues is None:
+                return
+            queues.discard(queue)
+            if queues:
+                return
+            del self.streams[channel]
+            try:
+                await self._pubsub.unsubscribe(channel)
+            except redis.RedisError as e:
+                logger.error(f"Error unsubscribing from {channel}: {e}")
+
+    async def _read(self):
+        """Dispatch published notifications to the stream queues until cancelled."""
+        while True:
+            try:
+                # The connection resubscribes to every channel when it reconnects
+                message = await self._pubsub.get_message(timeout=1.0)
+            except redis.RedisError as e:
+                logger.error(f"Notification stream listener disconnected: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is not None:
+                self._dispatch(message["channel"], message["data"])
+
+    def _dispatch(self, channel: str, data: str):
+        for queue in self.streams.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(data)
+            self.delivered += 1
+
+    async def close(self):
+        """Stop the listener and close the pub/sub connection."""
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        self.streams.clear()
+
+    def stats(self) -> dict:
+        """Report open streams and event counters."""
+        return {
+            "channels": len(self.streams),
+            "streams": sum(len(queues) for queues in self.streams.values()),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+notification_hub = NotificationHub()
+
+
+def get_notification_stream_stats() -> dict:
+    """Report open notification streams of this worker."""
+    return notification_hub.stats()
@@ -0,0 +1,44 @@
+# app/utils/pagination.py
+
+import base64
+from datetime import datetime
+from uuid import UUID
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_value: datetime, row_id: UUID) -> str:
+    """
+    Encode the keyset position of the last row of a page into an opaque cursor.
+
+    Args:
+        sort_value (datetime): Value of the sort column for the last row.
+        row_id (UUID): ID of the last row, used as a tie-breaker.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Opaque cursor string from a previous page.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+
+    Returns:
+        tuple[datetime, UUID]: The sort value and row ID of the last row seen.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sort_value, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(sort_value), UUID(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
@@ -1,15 +1,29 @@
 # app/utils/redis_cache.py:
 
+import asyncio
+import math
+import random
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Iterable
+from uuid import UUID
+import orjson
+import redis
+from fastapi import Response
 from redis.asyncio import Redis
 from .logging_config import logger
+from .ttl_cache import TTLCache
+from ..config import settings
 
 # Create a Redis client instance
-redis_client = Redis(
-    host="localhost",  # Adjust the host based on your Redis configuration
-    port=6379,         # Default Redis port
+redis_client = Redis.from_url(
+    settings.REDIS_URL,
     decode_responses=True  # Decode byte responses to strings
 )
 
+# Blocking client for Celery jobs, which run outside the event loop
+sync_redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
 import json
 
 async def set_cache(key: str, value: any, expire: int = 3600):
@@ -45,3 +59,350 @@ async def delete_cache(key: str):
         key (str): Cache key.
     """
     await redis_client.delete(key)
+
+
+
+# In-process L1 cache
+# Values for opted-in key prefixes are kept in each worker's memory in front of Redis.
+# Writers publish the keys they invalidate on INVALIDATION_CHANNEL and every worker's
+# listener evicts them. The L1 is only consulted while the listener is subscribed,
+# so processes without a listener (e.g. Celery workers) always read from Redis.
+INVALIDATION_CHANNEL = "cache-invalidation"
+local_cache = TTLCache(maxsize=settings.LOCAL_CACHE_SIZE, ttl=settings.LOCAL_CACHE_TTL)
+_local_prefixes: set[str] = set()
+_listener_subscribed = False
+_invalidation_epoch = 0  # Incremented on every eviction message received
+
+
+def enable_local_cache(*prefixes: str):
+    """
+    Opt cache keys starting with any of `prefixes` (e.g. "tasks") into the in-process L1.
+
+    Args:
+        *prefixes (str): Key namespaces, the part of the key before the first ":".
+    """
+    _local_prefixes.update(prefixes)
+
+
+def _local_cache_active(key: str | None = None) -> bool:
+    if not (settings.LOCAL_CACHE_ENABLED and _listener_subscribed):
+        return False
+    return key is None or key.split(":", 1)[0] in _local_prefixes
+
+
+async def listen_for_invalidations():
+    """
+    Evict L1 entries named on INVALIDATION_CHANNEL until cancelled.
+
+    Run this as a background task for the lifetime of the API process. The L1 is
+    cleared whenever the subscription is (re)established, since evictions may have
+    been missed while disconnected.
+    """
+    global _listener_subscribed, _invalidation_epoch
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            local_cache.clear()
+            _listener_subscribed = True
+            async for message in pubsub.listen():
+                _invalidation_epoch += 1
+                local_cache.pop(message["data"])
+        except redis.RedisError as e:
+            logger.error(f"Cache invalidation listener disconnected: {e}")
+            await asyncio.sleep(1)
+        finally:
+            _listener_subscribed = False
+            local_cache.clear()
+            await pubsub.aclose()
+
+
+def get_local_cache_stats() -> dict:
+    """Report size and hit/miss counters of the in-process L1 cache."""
+    return {
+        **local_cache.stats(),
+        "enabled": settings.LOCAL_CACHE_ENABLED,
+        "subscribed": _listener_subscribed,
+        "prefixes": sorted(_local_prefixes),
+    }
+
+
+# Stampede protection
+# Entries written by `get_or_compute` and `get_or_compute_response` are stored as "<expires_at>|<compute_seconds>|<json>".
+# The Redis TTL is longer than the logical expiry so a stale copy stays available
+# while a single caller holding "lock:<key>" recomputes it.
+STALE_TTL = 300  # Seconds a stale entry may still be served after its logical expiry
+LOCK_TIMEOUT = 10.0  # Seconds before a recompute lock is released automatically
+LOCK_POLL_INTERVAL = 0.05  # Seconds between checks while another caller recomputes
+
+
+def _pack(payload: str, expire: int, compute_seconds: float) -> str:
+    return f"{time.time() + expire:.3f}|{compute_seconds:.4f}|{payload}"
+
+
+def _unpack(raw: str) -> tuple[float, float, str]:
+    expires_at, compute_seconds, payload = raw.split("|", 2)
+    return float(expires_at), float(compute_seconds), payload
+
+
+def _should_refresh(expires_at: float, compute_seconds: float, beta: float) -> bool:
+    """
+    Probabilistic early expiration (XFetch).
+
+    The closer the entry is to expiry, and the longer it took to compute, the more
+    likely a reader is to refresh it early, so refreshes spread out instead of all
+    callers missing at the same instant.
+    """
+    return time.time() - compute_seconds * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+async def _acquire_lock(key: str, timeout: float) -> str | None:
+    token = uuid.uuid4().hex
+    if await redis_client.set(f"lock:{key}", token, nx=True, px=int(timeout * 1000)):
+        return token
+    return None
+
+
+async def _release_lock(key: str, token: str):
+    try:
+        if await redis_client.get(f"lock:{key}") == token:
+            await redis_client.delete(f"lock:{key}")
+    except redis.RedisError as e:
+        # The lock expires on its own after LOCK_TIMEOUT
+        logger.error(f"Error releasing lock for key {key}: {e}")
+
+
+async def _compute_and_store(key: str, compute: Callable[[], Awaitable[Any]], expire: int) -> tuple[Any, str]:
+    start = time.perf_counter()
+    value = await compute()
+    payload = orjson.dumps(value).decode()
+    try:
+        await redis_client.set(key, _pack(payload, expire, time.perf_counter() - start), ex=expire + STALE_TTL)
+    except redis.RedisError as e:
+        logger.error(f"Error setting cache for key {key}: {e}")
+    return value, payload
+
+
+async def get_or_compute(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    expire: int = 3600,
+    beta: float = 1.0,
+) -> Any:
+    """
+    Return the cached value for `key`, computing and caching it on a miss.
+
+    Keys whose prefix was passed to `enable_local_cache` are answered from the
+    in-process L1 first. Such keys should come from `versioned_key`, so a bump of
+    the user's generation is all it takes to stop serving them.
+    Only one caller per key recomputes at a time. Callers that find an expired
+    entry while another caller holds the lock get the stale value back.
+    Callers on a cold miss wait for the lock holder's result, for up to
+    LOCK_TIMEOUT seconds, and compute it themselves as soon as the holder
+    releases the lock without one (e.g. because `compute` raised). Entries are also refreshed early, at random, before
+    they expire.
+
+    Args:
+        key (str): Cache key.
+        compute (Callable[[], Awaitable[Any]]): Coroutine function producing a JSON-serializable value.
+        expire (int): Seconds before the entry is considered stale.
+        beta (float): Eagerness of early refresh; values above 1 refresh earlier.
+
+    Returns:
+        Any: The cached or freshly computed value.
+    """
+    use_local = _local_cache_active(key)
+    if use_local:
+        value = local_cache.get(key)
+        if value is not None:
+            return value
+
+    value = await _get_or_compute_shared(key, compute, expire, beta, raw=False)
+    if use_local:
+        local_cache.set(key, value)
+    return value
+
+
+async def get_or_compute_response(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    expire: int = 3600,
+    beta: float = 1.0,
+) -> Response | Any:
+    """
+    Like `get_or_compute`, but return the cached JSON as a ready-made response.
+
+    Hits are sent back as the exact bytes stored in Redis (or the L1), so FastAPI
+    neither parses nor validates them against the route's `response_model`.
+    `compute` must therefore return the final response body. When
+    `CACHE_RAW_RESPONSES` is off the parsed value is returned instead and goes
+    through the usual validation.
+
+    Args:
+        key (str): Cache key.
+        compute (Callable[[], Awaitable[Any]]): Coroutine function producing the response body.
+        expire (int): Seconds before the entry is considered stale.
+        beta (float): Eagerness of early refresh; values above 1 refresh earlier.
+
+    Returns:
+        Response | Any: A JSON response, or the parsed value when raw responses are disabled.
+    """
+    if not settings.CACHE_RAW_RESPONSES:
+        return await get_or_compute(key, compute, expire, beta)
+
+    use_local = _local_cache_active(key)
+    payload = local_cache.get(key) if use_local else None
+    if payload is None:
+        payload = await _get_or_compute_shared(key, compute, expire, beta, raw=True)
+        if use_local:
+            local_cache.set(key, payload)
+    return Response(content=payload, media_type="application/json")
+
+
+async def _get_or_compute_shared(
+    key: str, compute: Callable[[], Awaitable[Any]], expire: int, beta: float, raw: bool
+) -> Any:
+    """Return the cached entry as its JSON text when `raw` is set, or as the parsed value otherwise."""
+
+    def result(payload: str) -> Any:
+        return payload if raw else orjson.loads(payload)
+
+    computed = None  # Kept so a Redis error after computing does not compute again
+
+    async def refresh() -> Any:
+        nonlocal computed
+        value, payload = await _compute_and_store(key, compute, expire)
+        computed = payload if raw else value
+        return computed
+
+    try:
+        cached = await redis_client.get(key)
+        if cached is not None:
+            expires_at, compute_seconds, payload = _unpack(cached)
+            if not _should_refresh(expires_at, compute_seconds, beta):
+                return result(payload)
+            token = await _acquire_lock(key, LOCK_TIMEOUT)
+            if token is None:
+                return result(payload)  # Another caller is refreshing; serve the stale copy
+            try:
+                return await refresh()
+            finally:
+                await _release_lock(key, token)
+
+        token = await _acquire_lock(key, LOCK_TIMEOUT)
+        if token is not None:
+            try:
+                return await refresh()
+            finally:
+                await _release_lock(key, token)
+
+        # Cold miss while another caller computes: wait for its result instead of hitting the DB
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            cached, locked = await redis_client.mget(key, f"lock:{key}")
+            if cached is not None:
+                return result(_unpack(cached)[2])
+            if locked is None:
+                break  # The holder finished without storing a result (compute raised), so compute here
+        return await refresh()
+    except redis.RedisError as e:
+        logger.error(f"Cache unavailable for key {key}, computing directly: {e}")
+        if computed is not None:
+            return computed
+        value = await compute()
+        return orjson.dumps(value).decode() if raw else value
+
+
+# Per-user cache generations.
+# Every cache key for a user's task data embeds the user's current generation.
+# Writers bump the generation with a single INCR, which orphans all older keys;
+# they are never read again and expire on their own TTL. Generations are held in
+# the L1 too and evicted through INVALIDATION_CHANNEL when bumped.
+
+def _generation_key(user_id: UUID | str) -> str:
+    return f"cache-gen:{user_id}"
+
+
+async def get_generation(user_id: UUID | str) -> int:
+    """
+    Retrieve the current cache generation for a user.
+
+    Args:
+        user_id (UUID | str): ID of the user.
+
+    Returns:
+        int: The generation, 0 if the user's data was never written.
+    """
+    key = _generation_key(user_id)
+    use_local = _local_cache_active()
+    if use_local:
+        generation = local_cache.get(key)
+        if generation is not None:
+            return generation
+    epoch = _invalidation_epoch
+
+    generation = int(await redis_client.get(key) or 0)
+    # Skip the L1 write if an eviction arrived while the value was being read
+    if use_local and epoch == _invalidation_epoch:
+        local_cache.set(key, generation)
+    return generation
+
+
+async def versioned_key(prefix: str, user_id: UUID | str, *parts) -> str:
+    """
+    Build a cache key that embeds the user's current generation.
+
+    Args:
+        prefix (str): Key namespace, e.g. "tasks".
+        user_id (UUID | str): ID of the user owning the cached data.
+        *parts: Further key components, e.g. a task ID or a filter digest.
+
+    Returns:
+        str: Key of the form "<prefix>:<user_id>:<generation>:<parts...>".
+    """
+    generation = await get_generation(user_id)
+    return ":".join([prefix, str(user_id), str(generation), *map(str, parts)])
+
+
+async def bump_generation(user_id: UUID | str) -> int | None:
+    """
+    Invalidate every cached read of a user's task data.
+
+    Call this after the write is committed; a Redis failure is logged rather
+    than raised, so it does not fail a request whose write already succeeded.
+
+    Args:
+        user_id (UUID | str): ID of the user whose data changed.
+
+    Returns:
+        int | None: The new generation, or None if Redis could not be updated.
+    """
+    key = _generation_key(user_id)
+    local_cache.pop(key)
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.incr(key)
+            pipe.publish(INVALIDATION_CHANNEL, key)
+            generation, _ = await pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Error bumping cache generation for user {user_id}: {e}")
+        return None
+    return generation
+
+
+def bump_generations_sync(user_ids: Iterable[UUID | str]):
+    """
+    Invalidate the cached reads of several users from synchronous code (Celery jobs).
+
+    Args:
+        user_ids (Iterable[UUID | str]): IDs of the users whose data changed.
+    """
+    try:
+        with sync_redis_client.pipeline(transaction=False) as pipe:
+            for user_id in set(user_ids):
+                pipe.incr(_generation_key(user_id))
+                pipe.publish(INVALIDATION_CHANNEL, _generation_key(user_id))
+            pipe.execute()
+    except redis.RedisError as e:
+        logger.error(f"Error bumping cache generations: {e}")
@@ -1,5 +1,9 @@
 # app/utils/security.py
 
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import jwt
 from fastapi import Depends, HTTPException, status
 from datetime import datetime, timedelta
@@ -8,7 +12,8 @@ from .logging_config import logger
 from ..config import settings
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with other parameters (e.g. a lower BCRYPT_ROUNDS) are flagged for rehashing on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 # Hash a password
@@ -40,6 +45,121 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+# bcrypt takes tens to hundreds of milliseconds of CPU and releases the GIL while
+# it runs, so async routes hand it to a few threads instead of stalling the event
+# loop. A semaphore bounds the work admitted per process: once it is full, logins
+# wait for a slot and give up with a 503 rather than queueing without limit.
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+password_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHashMetrics:
+    """
+    Counters for the password hashing pool, reported by the `/metrics/password-hashing` endpoint.
+
+    Attributes:
+        operations (int): Hashes and verifications completed.
+        rejected (int): Operations that gave up waiting for a free slot.
+        pending (int): Operations running or queued right now.
+        seconds_total (float): Time spent hashing and verifying, summed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.operations = 0
+        self.rejected = 0
+        self.pending = 0
+        self.seconds_total = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.operations += 1
+            self.seconds_total += seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": settings.PASSWORD_HASH_WORKERS,
+                "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+                "pending": self.pending,
+                "operations": self.operations,
+                "rejected": self.rejected,
+                "avg_ms": round(self.seconds_total / self.operations * 1000, 3) if self.operations else 0.0,
+            }
+
+
+password_hash_metrics = PasswordHashMetrics()
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        password_hash_metrics.record(time.perf_counter() - start)
+
+
+async def _run_password_operation(func, *args):
+    """Run a password hashing function on the hashing pool, waiting for a free slot."""
+    try:
+        await asyncio.wait_for(password_slots.acquire(), timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        password_hash_metrics.rejected += 1
+        logger.warning("Password hashing pool is saturated, rejecting request.")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, please retry",
+            headers={"Retry-After": "1"},
+        )
+    password_hash_metrics.pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, _timed, func, *args)
+    finally:
+        password_hash_metrics.pending -= 1
+        password_slots.release()
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool, without blocking the event loop.
+
+    Args: \n
+        password (str): The plain text password to be hashed.
+
+    Returns:
+        str: The hashed password.
+
+    Raises:
+        HTTPException: If no hashing slot frees up within `PASSWORD_HASH_QUEUE_TIMEOUT` seconds.
+    """
+    return await _run_password_operation(pwd_context.hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify a password on the hashing pool, and rehash it if the hash is outdated.
+
+    Args: \n
+        plain_password (str): The plain text password.
+        hashed_password (str): The hashed password to compare with.
+
+    Returns:
+        tuple[bool, str | None]: Whether the passwords match, and a new hash to store
+            if the stored one was made with parameters other than `pwd_context`'s.
+
+    Raises:
+        HTTPException: If no hashing slot frees up within `PASSWORD_HASH_QUEUE_TIMEOUT` seconds.
+    """
+    return await _run_password_operation(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def get_password_hash_stats() -> dict:
+    """Report usage of the password hashing pool."""
+    return password_hash_metrics.snapshot()
+
+
 # JWT configuration
 SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = "HS256"
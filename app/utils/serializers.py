@@ -0,0 +1,24 @@
+# app/utils/serializers.py
+
+from app.models import Task
+from app.schemas import TaskResponse
+
+# Fields exposed by TaskResponse, in declaration order
+TASK_RESPONSE_FIELDS = tuple(TaskResponse.model_fields)
+
+
+def task_payload(task: Task) -> dict:
+    """
+    Serialize a task to the JSON body of a `TaskResponse`.
+
+    Cached responses are returned without passing through `response_model`, so
+    the body must already contain exactly the fields the schema exposes.
+
+    Args:
+        task (Task): The task to serialize.
+
+    Returns:
+        dict: The task's `TaskResponse` fields as JSON-compatible values.
+    """
+    data = task.to_dict()
+    return {field: data[field] for field in TASK_RESPONSE_FIELDS}
@@ -0,0 +1,115 @@
+# scripts/load_test.py
+
+"""
+Concurrent load test for a running Task Management API instance.
+
+Start a single worker so the numbers reflect requests per worker:
+
+    uvicorn app.main:app --workers 1
+    python scripts/load_test.py --token <api_key> --concurrency 50 --requests 2000
+
+Run it once against the sync-session build and once against the async build
+to compare throughput and latency at the same concurrency.
+
+With `--login-email` and `--login-password` it benchmarks logins instead,
+reporting logins/sec per worker. `--probe-path` keeps timing a cheap GET
+meanwhile, which shows whether password hashing stalls other requests:
+
+    python scripts/load_test.py --login-email user@example.com --login-password secret \\
+        --concurrency 20 --requests 500 --probe-path /docs
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+
+async def worker(client: httpx.AsyncClient, send, jobs: asyncio.Queue, latencies: list, errors: list):
+    """Send requests until the job queue is drained, recording latency per request."""
+    while True:
+        try:
+            jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        start = time.perf_counter()
+        try:
+            response = await send(client)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+async def probe(client: httpx.AsyncClient, path: str, interval: float, done: asyncio.Event, latencies: list):
+    """Time a GET of `path` every `interval` seconds until `done` is set."""
+    while not done.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get(path)
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+def percentiles(latencies: list) -> str:
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms p99={quantiles[98] * 1000:.1f}ms"
+
+
+async def run(args):
+    if args.login_email:
+        label, unit = "POST /auth/user/login", "logins/s"
+        credentials = {"email": args.login_email, "password": args.login_password}
+        send = lambda client: client.post("/auth/user/login", json=credentials)
+    else:
+        label, unit = f"GET {args.path}", "req/s"
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        send = lambda client: client.get(args.path, headers=headers)
+
+    jobs = asyncio.Queue()
+    for _ in range(args.requests):
+        jobs.put_nowait(None)
+
+    latencies, errors, probe_latencies = [], [], []
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        done = asyncio.Event()
+        probing = asyncio.create_task(
+            probe(client, args.probe_path, args.probe_interval, done, probe_latencies)
+        ) if args.probe_path else None
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, send, jobs, latencies, errors)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+        done.set()
+        if probing is not None:
+            await probing
+
+    print(f"{label}  concurrency={args.concurrency}  requests={len(latencies)}")
+    print(f"throughput: {len(latencies) / elapsed:.1f} {unit} over {elapsed:.2f}s")
+    print(f"latency {percentiles(latencies)}")
+    print(f"errors: {len(errors)}")
+    if probe_latencies:
+        print(f"probe GET {args.probe_path}: {len(probe_latencies)} requests, latency {percentiles(probe_latencies)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Task Management API.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/tasks/")
+    parser.add_argument("--token", help="API key sent as a bearer token.")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--login-email", help="Benchmark logins with this account instead of GET --path.")
+    parser.add_argument("--login-password", help="Password of the --login-email account.")
+    parser.add_argument("--probe-path", help="Cheap path timed during the run to detect event loop stalls.")
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    asyncio.run(run(parser.parse_args()))